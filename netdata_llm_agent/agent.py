@@ -5,8 +5,19 @@
 NetdataLLMAgent is a language model agent that can interact with Netdata API to provide information about Netdata charts, chart info, and chart data.
 """
 
+import threading
+import time
+import uuid
+
+from langgraph.errors import GraphRecursionError
 from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
 from langchain_core.tools import tool
 
 from netdata_llm_agent.tools import (
@@ -20,6 +31,11 @@ from netdata_llm_agent.tools import (
     get_netdata_docs_sitemap,
     get_netdata_docs_page,
 )
+from netdata_llm_agent.inventory import build_inventory
+from netdata_llm_agent.checkpoints import ConversationStore
+from netdata_llm_agent.cache import AnswerCache
+from netdata_llm_agent.routing import create_routed_agent, routing_summary
+from netdata_llm_agent.limits import cap_tool_output, trim_history
 
 
 SYSTEM_PROMPT = """
@@ -29,25 +45,39 @@ The following tools are available:
 - get_info(netdata_host_url) : Get Netdata info about the node.
 - get_charts(netdata_host_url, search_term, include_dimensions) : Get Netdata charts, optionally filter by search_term. include_dimensions=True to get the dimensions for each chart.
 - get_chart_info(netdata_host_url, chart) : Get Netdata chart info for a specific chart.
-- get_chart_data(netdata_host_url, chart, after, before, points, options, df_freq) : Get Netdata chart data for a specific chart. Optionally filter by after, before, points, options, and df_freq. options can be used to add optional flags for example 'anomaly-bit' will return anomaly rates rather than raw metric values.
-- get_alarms(netdata_host_url, all, active) : Get Netdata alarms. all=True to get all alarms, active=True to get active alarms (warning or critical).
+- get_chart_data(netdata_host_url, chart, after, before, points, options, df_freq, group) : Get Netdata chart data for a specific chart. Optionally filter by after, before, points, options, df_freq and group. options can be used to add optional flags for example 'anomaly-bit' will return anomaly rates rather than raw metric values.
+- get_alarms(netdata_host_url, all, active, compact, max_rows) : Get Netdata alarms. all=True to get all alarms, active=True to get active alarms (warning or critical). compact=True returns a compact table of the most severe and recent alarms (up to max_rows) plus counts per status, class, component and chart, prefer it for all=True or busy parents.
 - get_current_metrics(netdata_host_url, search_term) : Get current metrics values for all charts, no time range, just the current values for all dimensions on all charts. Optionally filter by search_term on chart name.
 - get_anomaly_rates(netdata_host_url, after, before, search_term) : Get anomaly rates for a specific time frame for all charts or optionally filter by search_term on chart name.
 - get_netdata_docs_sitemap(search_term) : Get Netdata docs sitemap to list available Netdata documentation pages. Use search_term to filter by a specific term.
-- get_netdata_docs_page(url) : Get Netdata docs page content for a specific docs page url on learn.netdata.cloud.
+- get_netdata_docs_page(url, sections, max_chars) : Get Netdata docs page content for a specific docs page url on learn.netdata.cloud. Use sections to only get the sections whose heading matches, e.g. sections='configuration'.
 
 General Notes:
 - Every netdata node is different and may have different charts available so it's usually best to check the available charts with get_charts() first.
-- When pulling data from get_chart_data() you can leverage the points and df_freq param's to aggregate data points given the specific after and before time range.
+- When pulling data from get_chart_data() the points and group (aggregation method) are picked automatically from the after and before time range and number of dimensions, only set points, group or df_freq if you need a specific resolution or aggregation (e.g. group='max' for peaks).
 - When there are multiple mirrored hosts you can adapt the base url to reflect the specific host you want to pull data from if the user asks about one of the mirrored hosts.
 - Charts with breakouts per user typically live at user.* eg. user.cpu_utilization, user.mem_usage etc. as per get_charts().
 - Charts with breakouts per application typically live at app.* eg. app.cpu_utilization, app.mem_usage etc. as per get_charts().
 - Use get_charts() with the search_term param to filter charts by a specific term if unsure of the chart name, if looking for charts with specific dimensions use include_dimensions=True, search term works for chart name and dimensions.
+- Large tool outputs are truncated with a note saying how to narrow the query, if you see one narrow the query (e.g. a search_term or shorter time range) rather than repeating the same call.
 - Once you have the chart name you can use get_chart_info() to get more detailed information about the chart and get_chart_data() to get the data for the chart.
 - It's "Netdata" not "NetData" - note no capitalization on the "D", its common for users to refer to Netdata as NetData but you should not, you know better ;)
 """
 
 
+TOOL_FUNCTIONS = [
+    get_info,
+    get_charts,
+    get_chart_info,
+    get_chart_data,
+    get_alarms,
+    get_current_metrics,
+    get_anomaly_rates,
+    get_netdata_docs_sitemap,
+    get_netdata_docs_page,
+]
+
+
 SUPPORTED_MODELS = {
     "openai": ["gpt-3.5-turbo", "gpt-4o", "gpt-4o-mini"],
     "anthropic": ["claude-3-5-sonnet-20241022"],
@@ -55,6 +85,41 @@ SUPPORTED_MODELS = {
 }
 
 
+def usage_summary(messages: list) -> dict:
+    """
+    Summarize the token usage of the LLM calls in a list of messages, e.g. the new messages of a turn, including fast model calls discarded by the router.
+
+    Args:
+        messages: List of messages.
+
+    Returns:
+        Dict with llm_calls, input_tokens, cached_input_tokens (read from the prompt cache), cache_creation_input_tokens (written to the prompt cache), uncached_input_tokens and output_tokens.
+    """
+    usage = {
+        "llm_calls": 0,
+        "input_tokens": 0,
+        "cached_input_tokens": 0,
+        "cache_creation_input_tokens": 0,
+        "uncached_input_tokens": 0,
+        "output_tokens": 0,
+    }
+    for m in messages:
+        routing = (getattr(m, "response_metadata", None) or {}).get("routing") or {}
+        # a fast model call discarded by the router is still paid for
+        for usage_metadata in (getattr(m, "usage_metadata", None), routing.get("discarded_usage")):
+            if not usage_metadata:
+                continue
+            details = usage_metadata.get("input_token_details") or {}
+            usage["llm_calls"] += 1
+            usage["input_tokens"] += usage_metadata.get("input_tokens", 0)
+            usage["cached_input_tokens"] += details.get("cache_read") or 0
+            usage["cache_creation_input_tokens"] += details.get("cache_creation") or 0
+            usage["output_tokens"] += usage_metadata.get("output_tokens", 0)
+    usage["uncached_input_tokens"] = usage["input_tokens"] - usage["cached_input_tokens"]
+
+    return usage
+
+
 class NetdataLLMAgent:
     """
     NetdataLLMAgent is a language model agent that can interact with Netdata API to provide information about Netdata charts, chart info, and chart data.
@@ -64,6 +129,22 @@ class NetdataLLMAgent:
         model: Language model to use. Default is 'gpt-4o'.
         system_prompt: System prompt to use. Default is SYSTEM_PROMPT.
         platform: Platform to use. Default is 'openai'.
+        host_inventory: If True, precompute a compact inventory of each host and embed it in the system prompt. Default is False.
+        inventory_max_tokens: Approximate token budget for the host inventory. Default is 1500.
+        inventory_refresh_seconds: Rebuild the host inventory in the background when it is older than this many seconds, the stale inventory is used until the rebuild is done. Default is 600.
+        checkpoint_db: Path to a SQLite database to persist conversations in, ':memory:' for an in-process store. Default is None (conversation only kept in memory on the agent).
+        conversation_store: An existing ConversationStore to persist conversations in, e.g. to share one store between agents. Takes precedence over checkpoint_db.
+        thread_id: Conversation thread id to resume when persisting conversations. Default is None (a new thread is started on the first chat).
+        answer_cache: AnswerCache to answer repeated standalone questions from, can be shared between agents. Default is None (no caching).
+        prompt_caching: If True, mark the system prompt (and so the tool schemas before it) for prompt caching on Anthropic. OpenAI caches the stable prefix automatically. Default is True.
+        router_model: Optional fast model (e.g. 'gpt-4o-mini' or a local ollama model) for intermediate tool calling steps, escalating to model for the final answer or when the fast model looks unsure. Default is None (model handles every step).
+        router_platform: Platform of the router model. Default is None (same as platform).
+        llm: Optional chat model instance to use instead of creating one from model and platform, e.g. a local stand-in for evaluation. Default is None.
+        max_steps: Maximum number of model steps (each tool calling round is one) per turn. Default is 12.
+        max_turn_seconds: Wall-clock deadline per turn in seconds, checked between steps. When reached, pending tool calls are skipped and the turn ends with a note. Default is 120, None for no deadline.
+        tool_output_max_tokens: Approximate token cap on each tool output, larger outputs are truncated with a hint on how to narrow the query. Default is 8000, None for no cap.
+        tool_output_limits: Optional dict of tool name to token cap, overriding tool_output_max_tokens for those tools.
+        max_history_messages: Approximate number of messages (including tool calls and results) kept in the conversation after each turn, older turns are dropped from the state so the prompt and the stored thread stop growing. Default is None (keep everything).
     """
 
     def __init__(
@@ -72,55 +153,123 @@ class NetdataLLMAgent:
         model: str = "gpt-4o",
         system_prompt: str = SYSTEM_PROMPT,
         platform: str = "openai",
+        host_inventory: bool = False,
+        inventory_max_tokens: int = 1500,
+        inventory_refresh_seconds: int = 600,
+        checkpoint_db: str = None,
+        conversation_store: ConversationStore = None,
+        thread_id: str = None,
+        answer_cache: AnswerCache = None,
+        prompt_caching: bool = True,
+        router_model: str = None,
+        router_platform: str = None,
+        llm=None,
+        max_steps: int = 12,
+        max_turn_seconds: float = 120,
+        tool_output_max_tokens: int = 8000,
+        tool_output_limits: dict = None,
+        max_history_messages: int = None,
     ):
         self.netdata_host_urls = netdata_host_urls
+        self.model = model
+        self.base_system_prompt = system_prompt
+        self.host_inventory = host_inventory
+        self.inventory_max_tokens = inventory_max_tokens
+        self.inventory_refresh_seconds = inventory_refresh_seconds
+        self.inventory = None
+        self.inventory_updated_at = None
+        self.inventory_lock = threading.Lock()
+        self.inventory_refreshing = False
+        if self.host_inventory:
+            self._refresh_inventory()
         self.system_prompt = self._create_system_prompt(
             system_prompt, netdata_host_urls
         )
         self.messages = {"messages": []}
+        if conversation_store is None and checkpoint_db is not None:
+            conversation_store = ConversationStore(checkpoint_db)
+        self.conversation_store = conversation_store
+        self.thread_id = thread_id
+        self.answer_cache = answer_cache
+        self.last_answer_cached = False
+        self.prompt_caching = prompt_caching
+        self.last_usage = usage_summary([])
         self.platform = platform
-        self.llm = self._create_llm(model)
+        self.llm = llm if llm is not None else self._create_llm(model)
+        self.router_model = router_model
+        self.router_platform = router_platform or platform
+        self.router_llm = (
+            self._create_llm(router_model, platform=self.router_platform)
+            if router_model
+            else None
+        )
+        self.last_routing = routing_summary([])
+        self.max_steps = max_steps
+        self.max_turn_seconds = max_turn_seconds
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.tool_output_limits = tool_output_limits or {}
+        self.max_history_messages = max_history_messages
         self.tools = [
-            tool(get_info, parse_docstring=True),
-            tool(get_charts, parse_docstring=True),
-            tool(get_chart_info, parse_docstring=True),
-            tool(get_chart_data, parse_docstring=True),
-            tool(get_alarms, parse_docstring=True),
-            tool(get_current_metrics, parse_docstring=True),
-            tool(get_anomaly_rates, parse_docstring=True),
-            tool(get_netdata_docs_sitemap, parse_docstring=True),
-            tool(get_netdata_docs_page, parse_docstring=True),
+            tool(
+                cap_tool_output(
+                    f, self.tool_output_limits.get(f.__name__, tool_output_max_tokens)
+                ),
+                parse_docstring=True,
+            )
+            for f in TOOL_FUNCTIONS
         ]
 
-        self.agent = create_react_agent(
-            self.llm, tools=self.tools, prompt=SystemMessage(content=self.system_prompt)
+        self.agent = self._create_agent()
+
+    def _create_agent(self):
+        """
+        Create the ReAct agent graph from the language model, tools and system prompt.
+        """
+        checkpointer = self.conversation_store.saver if self.conversation_store else None
+        if self.router_llm is not None:
+            return create_routed_agent(
+                self.router_llm,
+                self.llm,
+                self.tools,
+                fast_prompt=self._create_system_message(self.router_platform),
+                strong_prompt=self._create_system_message(self.platform),
+                checkpointer=checkpointer,
+            )
+        return create_react_agent(
+            self.llm,
+            tools=self.tools,
+            prompt=self._create_system_message(self.platform),
+            checkpointer=checkpointer,
         )
 
-    def _create_llm(self, model: str):
+    def _create_llm(self, model: str, platform: str = None):
         """
         Create the language model agent.
 
         Args:
             model: Language model to use.
+            platform: Platform of the model. Default is None (self.platform).
         """
-        if self.platform == "openai":
+        platform = platform or self.platform
+        if platform == "openai":
             from langchain_openai import ChatOpenAI
 
             if model in SUPPORTED_MODELS["openai"]:
-                return ChatOpenAI(model=model)
-        elif self.platform == "anthropic":
+                # usage is reported when streaming too, e.g. for the router's fast model
+                return ChatOpenAI(model=model, stream_usage=True)
+        elif platform == "anthropic":
             from langchain_anthropic import ChatAnthropic
 
             if model in SUPPORTED_MODELS["anthropic"]:
                 return ChatAnthropic(model=model)
-        elif self.platform == "ollama":
+        elif platform == "ollama":
             from langchain_ollama import ChatOllama
 
-            if model not in SUPPORTED_MODELS["ollama"]:
-                return ChatOllama(model=model)
+            # any locally pulled model can be used with ollama
+            return ChatOllama(model=model)
         else:
             raise ValueError(
-                f"Platform {self.platform} and model {model} not supported."
+                f"Platform {platform} and model {model} not supported."
             )
 
     def _create_system_prompt(self, base_prompt: str, netdata_host_urls: list) -> str:
@@ -134,9 +283,340 @@ class NetdataLLMAgent:
         Returns:
             The complete system prompt.
         """
+        return f"{base_prompt}\n{self._create_specific_notes(netdata_host_urls)}"
+
+    def _create_specific_notes(self, netdata_host_urls: list) -> str:
+        """
+        Create the specific notes about the Netdata hosts (and the host inventory if enabled) that follow the base system prompt.
+
+        Args:
+            netdata_host_urls: List of Netdata host URLs.
+
+        Returns:
+            The specific notes.
+        """
         specific_notes = "Specific Notes: \n"
         specific_notes += f"- The netdata_host_urls available are {netdata_host_urls}"
-        return f"{base_prompt}\n{specific_notes}"
+        if self.inventory:
+            specific_notes += f"\n\n{self.inventory}"
+        return specific_notes
+
+    def _create_system_message(self, platform: str) -> SystemMessage:
+        """
+        Create the system message for the agent graph for a model on the given platform.
+
+        The static base prompt always comes first and the host specific notes last, so the prefix (tools, then base prompt) stays byte-identical between calls and OpenAI's automatic prompt caching applies. For Anthropic, cache_control breakpoints are set on both parts so tools and base prompt stay cached even when the host inventory is refreshed.
+        """
+        if not (self.prompt_caching and platform == "anthropic"):
+            return SystemMessage(content=self.system_prompt)
+
+        return SystemMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": self.base_system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {
+                    "type": "text",
+                    "text": self._create_specific_notes(self.netdata_host_urls),
+                    "cache_control": {"type": "ephemeral"},
+                },
+            ]
+        )
+
+    def _refresh_inventory(self):
+        """
+        Rebuild the host inventory used in the system prompt.
+        """
+        self.inventory = build_inventory(
+            self.netdata_host_urls, max_tokens=self.inventory_max_tokens
+        )
+        self.inventory_updated_at = time.monotonic()
+
+    def _refresh_inventory_if_stale(self):
+        """
+        Start rebuilding the host inventory in a background thread if it is older than inventory_refresh_seconds.
+
+        Turns keep using the stale inventory (and the graph built with it) until the refresh is done, see _swap_inventory().
+        """
+        if not self.host_inventory:
+            return
+        with self.inventory_lock:
+            age = time.monotonic() - self.inventory_updated_at
+            if self.inventory_refreshing or age < self.inventory_refresh_seconds:
+                return
+            self.inventory_refreshing = True
+        threading.Thread(target=self._swap_inventory, daemon=True).start()
+
+    def _swap_inventory(self):
+        """
+        Rebuild the host inventory and then swap in the new system prompt and agent graph together.
+        """
+        try:
+            inventory = build_inventory(
+                self.netdata_host_urls, max_tokens=self.inventory_max_tokens
+            )
+            with self.inventory_lock:
+                self.inventory = inventory
+                self.inventory_updated_at = time.monotonic()
+                self.system_prompt = self._create_system_prompt(
+                    self.base_system_prompt, self.netdata_host_urls
+                )
+                self.agent = self._create_agent()
+        finally:
+            with self.inventory_lock:
+                self.inventory_refreshing = False
+
+    def resume(self, thread_id: str):
+        """
+        Resume a persisted conversation thread, loading its messages into the agent.
+
+        Args:
+            thread_id: Thread id to resume.
+        """
+        if self.conversation_store is None:
+            raise ValueError("Resuming a conversation requires checkpoint_db or conversation_store.")
+        self.thread_id = thread_id
+        state = self.agent.get_state({"configurable": {"thread_id": thread_id}})
+        self.messages = {"messages": state.values.get("messages", [])}
+
+    def list_threads(self, limit: int = 50) -> list:
+        """
+        List persisted conversation threads, most recently updated first.
+
+        Args:
+            limit: Maximum number of threads to return. Default is 50.
+
+        Returns:
+            List of dicts with thread_id, title, created_at, updated_at, turns and messages.
+        """
+        if self.conversation_store is None:
+            return []
+        return self.conversation_store.list_threads(limit=limit)
+
+    def _record_cached(self, message: str, answer: str, continue_chat: bool, thread_id: str = None):
+        """
+        Add a cached question and answer to the conversation without running the agent graph.
+
+        Args:
+            message: Message sent to the agent.
+            answer: Cached answer.
+            continue_chat: If True, continue the current conversation.
+            thread_id: Persisted thread to record into. Default is None (use the agent's own thread).
+
+        Returns:
+            Tuple of the updated state and the list of new messages.
+        """
+        new_messages = [AIMessage(content=answer, response_metadata={"cached": True})]
+        turn = [HumanMessage(content=message), *new_messages]
+        if self.conversation_store is None:
+            previous = self.messages["messages"] if continue_chat else []
+            self.messages = {
+                "messages": trim_history([*previous, *turn], self.max_history_messages)
+            }
+            return self.messages, new_messages
+
+        config = self._thread_config(continue_chat, thread_id)
+        self.agent.update_state(config, {"messages": turn}, as_node="agent")
+        messages_updated = self.agent.get_state(config).values
+        self._finish_turn(config, message, messages_updated)
+        return messages_updated, new_messages
+
+    def _thread_config(self, continue_chat: bool, thread_id: str = None) -> dict:
+        """
+        Get the graph config for the persisted thread a message runs in, starting a new own thread unless continuing.
+
+        Args:
+            continue_chat: If True, continue the current conversation.
+            thread_id: Persisted thread to run in. Default is None (use the agent's own thread).
+
+        Returns:
+            Graph config with the thread id.
+        """
+        if thread_id is None:
+            if not continue_chat or self.thread_id is None:
+                self.thread_id = str(uuid.uuid4())
+            thread_id = self.thread_id
+        return {"configurable": {"thread_id": thread_id}}
+
+    def _finish_turn(self, config: dict, message: str, messages_updated: dict):
+        """
+        Record a completed turn in the conversation store, dropping the oldest turns beyond max_history_messages, and keep self.messages in sync for the agent's own thread.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        messages = messages_updated["messages"]
+        dropped = messages[: len(messages) - len(trim_history(messages, self.max_history_messages))]
+        if dropped:
+            self.agent.update_state(
+                config, {"messages": [RemoveMessage(id=m.id) for m in dropped]}, as_node="agent"
+            )
+            messages_updated = self.agent.get_state(config).values
+        self.conversation_store.record_turn(
+            thread_id, title=message, messages=len(messages_updated["messages"])
+        )
+        self.conversation_store.compact_thread(thread_id)
+        if thread_id == self.thread_id:
+            self.messages = messages_updated
+
+    def _is_standalone(self, continue_chat: bool, thread_id: str = None) -> bool:
+        """
+        Check if a message starts a new conversation, i.e. its answer does not depend on earlier messages.
+        """
+        if thread_id is not None and self.conversation_store is not None:
+            config = {"configurable": {"thread_id": thread_id}}
+            return not self.agent.get_state(config).values.get("messages")
+        return not continue_chat or not self.messages["messages"]
+
+    def _budget_messages(self, messages: list, reason: str) -> list:
+        """
+        Messages that end a turn stopped by the step or time budget: a skipped result for each pending tool call, so the history stays valid, and a final note.
+
+        Args:
+            messages: Messages of the stopped turn so far.
+            reason: Budget that was reached.
+
+        Returns:
+            List of messages to append.
+        """
+        last = messages[-1]
+        budget_messages = [
+            ToolMessage(
+                content=f"Not run, {reason} was reached.",
+                tool_call_id=c["id"],
+                name=c["name"],
+            )
+            for c in (last.tool_calls if last.type == "ai" else [])
+        ]
+        budget_messages.append(
+            AIMessage(
+                content=(
+                    f"I stopped before finishing as {reason} for a single question was reached. "
+                    "Try a narrower question (e.g. a specific host, chart or shorter time range), "
+                    "or ask me to continue."
+                ),
+                response_metadata={"budget_exceeded": reason},
+            )
+        )
+        return budget_messages
+
+    def _stream_turn(self, message: str, continue_chat: bool, thread_id: str = None):
+        """
+        Run the agent graph for a new user message, yielding as each step completes.
+
+        The turn is stopped gracefully once max_steps or max_turn_seconds is reached, see _budget_messages().
+
+        Args:
+            message: Message to send to the agent.
+            continue_chat: If True, continue the current conversation.
+            thread_id: Persisted thread to run in. Default is None (use the agent's own thread).
+
+        Yields:
+            Tuples of the updated state and the new messages produced by the step.
+        """
+        if self.conversation_store is None:
+            if continue_chat:
+                self.messages["messages"].append(HumanMessage(content=message))
+            else:
+                self.messages = {"messages": [HumanMessage(content=message)]}
+            inputs, config = self.messages, None
+            seen = len(self.messages["messages"])
+        else:
+            # with a checkpointer the graph holds the history, so only the new message is sent
+            config = self._thread_config(continue_chat, thread_id)
+            inputs = {"messages": [HumanMessage(content=message)]}
+            seen = len(self.agent.get_state(config).values.get("messages", [])) + 1
+
+        # each step is a model call plus a tools call, the recursion limit is only a backstop
+        run_config = {**(config or {}), "recursion_limit": 2 * self.max_steps + 2}
+        deadline = (
+            time.monotonic() + self.max_turn_seconds if self.max_turn_seconds else None
+        )
+        messages_updated, stopped, steps = None, None, 0
+        try:
+            for messages_updated in self.agent.stream(
+                inputs, run_config, stream_mode="values"
+            ):
+                new_messages = messages_updated["messages"][seen:]
+                seen = len(messages_updated["messages"])
+                if new_messages:
+                    yield messages_updated, new_messages
+                steps += sum(1 for m in new_messages if m.type == "ai")
+                last = messages_updated["messages"][-1]
+                if steps >= self.max_steps and last.type == "ai" and last.tool_calls:
+                    stopped = f"the {self.max_steps} step limit"
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    stopped = f"the {self.max_turn_seconds:g}s time limit"
+                    break
+        except GraphRecursionError:
+            stopped = f"the {self.max_steps} step limit"
+
+        last = messages_updated["messages"][-1]
+        if stopped is not None and (last.type != "ai" or last.tool_calls):
+            budget_messages = self._budget_messages(messages_updated["messages"], stopped)
+            if self.conversation_store is None:
+                messages_updated = {"messages": [*messages_updated["messages"], *budget_messages]}
+            else:
+                # the checkpoint is left at the last completed step, add the messages to it
+                self.agent.update_state(config, {"messages": budget_messages}, as_node="agent")
+                messages_updated = self.agent.get_state(config).values
+            yield messages_updated, budget_messages
+
+        if self.conversation_store is None:
+            self.messages = {
+                "messages": trim_history(messages_updated["messages"], self.max_history_messages)
+            }
+        else:
+            self._finish_turn(config, message, messages_updated)
+
+    def _turn(self, message: str, continue_chat: bool, thread_id: str = None):
+        """
+        Answer a user message from the answer cache if possible, otherwise run the agent graph and cache the answer.
+
+        Args:
+            message: Message to send to the agent.
+            continue_chat: If True, continue the current conversation.
+            thread_id: Persisted thread to run in. Default is None (use the agent's own thread).
+
+        Yields:
+            Tuples of the updated state and the new messages produced by each step.
+        """
+        self._refresh_inventory_if_stale()
+        standalone = self.answer_cache is not None and self._is_standalone(
+            continue_chat, thread_id
+        )
+        cached = (
+            self.answer_cache.get(message, self.netdata_host_urls) if standalone else None
+        )
+        self.last_answer_cached = cached is not None
+        if cached is not None:
+            yield self._record_cached(message, cached, continue_chat, thread_id)
+            return
+
+        messages_updated = None
+        for messages_updated, new_messages in self._stream_turn(
+            message, continue_chat, thread_id
+        ):
+            yield messages_updated, new_messages
+        answer = messages_updated["messages"][-1]
+        if standalone and not answer.response_metadata.get("budget_exceeded"):
+            self.answer_cache.put(message, self.netdata_host_urls, answer.content)
+
+    def stream_chat(self, message: str, continue_chat: bool = False, thread_id: str = None):
+        """
+        Chat with the NetdataLLMAgent, yielding new messages (tool calls, tool results and the final answer) as they are produced.
+
+        Args:
+            message: Message to send to the agent.
+            continue_chat: If True, continue the chat from the last message. Default is False.
+            thread_id: Persisted conversation thread to continue, requires checkpoint_db or conversation_store. Default is None (use the agent's own thread).
+
+        Yields:
+            New messages. Answers from the answer cache have response_metadata["cached"] set to True.
+        """
+        for _, new_messages in self._turn(message, continue_chat, thread_id):
+            yield from new_messages
 
     def chat(
         self,
@@ -146,6 +626,7 @@ class NetdataLLMAgent:
         no_print: bool = True,
         return_last: bool = False,
         return_thinking: bool = False,
+        thread_id: str = None,
     ):
         """
         Chat with the NetdataLLMAgent.
@@ -157,29 +638,27 @@ class NetdataLLMAgent:
             no_print: If True, do not print the messages. Default is True.
             return_last: If True, return the last message content. Default is False.
             return_thinking: If True, return the new messages. Default is False.
+            thread_id: Persisted conversation thread to continue, requires checkpoint_db or conversation_store. Default is None (use the agent's own thread).
 
         Returns:
             If return_last is True, return the last message content.
             If return_thinking is True, return the new messages.
+            last_answer_cached is set to True if the answer came from the answer cache rather than a fresh agent run.
+            last_usage is set to the token usage of the turn, see usage_summary().
+            last_routing is set to the routing metrics of the turn when using router_model, see routing_summary().
         """
-        if continue_chat:
-            self.messages["messages"].append(HumanMessage(content=message))
-        else:
-            self.messages = {"messages": [HumanMessage(content=message)]}
-        messages_updated = self.agent.invoke(self.messages)
-        len_messages_updated = len(messages_updated["messages"])
-        len_self_messages = len(self.messages["messages"])
-        new_messages = messages_updated["messages"][
-            -(len_messages_updated - len_self_messages) :
-        ]
-        self.messages = messages_updated
+        messages_updated, new_messages = None, []
+        for messages_updated, step_messages in self._turn(message, continue_chat, thread_id):
+            new_messages.extend(step_messages)
+        self.last_usage = usage_summary(new_messages)
+        self.last_routing = routing_summary(new_messages)
         if not no_print:
             if verbose:
-                for m in self.messages["messages"]:
+                for m in messages_updated["messages"]:
                     m.pretty_print()
                 else:
-                    self.messages["messages"][-1].pretty_print()
+                    messages_updated["messages"][-1].pretty_print()
         if return_last:
-            return self.messages["messages"][-1].content
+            return messages_updated["messages"][-1].content
         if return_thinking:
             return new_messages
@@ -3,10 +3,18 @@
 
 """
 Streamlit app for the Netdata LLM Agent Chat.
+
+All browser sessions share one NetdataLLMAgent per set of Netdata urls and one conversation store, each session is its own conversation thread in the store. Session state only holds small {"role", "content"} records for display, capped at the history limit, and the agent caps the messages kept in each thread.
 """
 
+import os
+import threading
+import time
+import uuid
+
 import streamlit as st
 from netdata_llm_agent.agent import NetdataLLMAgent
+from netdata_llm_agent.checkpoints import ConversationStore
 
 DEFAULT_NETDATA_URLS = [
     "http://localhost:19999/",
@@ -18,23 +26,122 @@ DEFAULT_NETDATA_URLS = [
     "https://toronto.my-netdata.io/",
 ]
 
+# messages kept in each session for display, and how many of those are rendered
+DEFAULT_MAX_HISTORY = int(os.environ.get("NETDATA_LLM_APP_MAX_HISTORY", 100))
+DEFAULT_RENDER_LIMIT = int(os.environ.get("NETDATA_LLM_APP_RENDER_LIMIT", 20))
+# messages (including tool calls and results) the agent keeps in each conversation thread
+MAX_THREAD_MESSAGES = int(os.environ.get("NETDATA_LLM_APP_MAX_THREAD_MESSAGES", 200))
+# conversation threads kept in the shared store, oldest are pruned first
+MAX_THREADS = int(os.environ.get("NETDATA_LLM_APP_MAX_THREADS", 1000))
+# agents kept for distinct sets of Netdata urls, least recently used are dropped first
+MAX_AGENTS = int(os.environ.get("NETDATA_LLM_APP_MAX_AGENTS", 8))
+# threads of sessions seen within this many seconds are never pruned
+SESSION_IDLE_SECONDS = int(os.environ.get("NETDATA_LLM_APP_SESSION_IDLE_SECONDS", 3600))
+
+
+class ActiveThreads:
+    """
+    ActiveThreads tracks when the conversation thread of each session was last used, so pruning the shared store skips threads of live sessions.
+
+    Args:
+        idle_seconds: Seconds after its last use that a thread is no longer considered active.
+    """
+
+    def __init__(self, idle_seconds: float):
+        self.idle_seconds = idle_seconds
+        self.last_seen = {}
+        self.lock = threading.Lock()
+
+    def touch(self, thread_id: str):
+        """Mark a thread as used now."""
+        with self.lock:
+            self.last_seen[thread_id] = time.monotonic()
+
+    def discard(self, thread_id: str):
+        """Stop tracking a thread."""
+        with self.lock:
+            self.last_seen.pop(thread_id, None)
+
+    def snapshot(self) -> set:
+        """Get the threads used within idle_seconds, forgetting the others."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self.lock:
+            for thread_id in [t for t, seen in self.last_seen.items() if seen < cutoff]:
+                del self.last_seen[thread_id]
+            return set(self.last_seen)
+
+
+@st.cache_resource
+def get_conversation_store() -> ConversationStore:
+    """Conversation store shared by all sessions."""
+    return ConversationStore(os.environ.get("NETDATA_LLM_CHECKPOINT_DB", ":memory:"))
+
+
+@st.cache_resource(max_entries=MAX_AGENTS)
+def get_agent(netdata_urls: tuple) -> NetdataLLMAgent:
+    """
+    Agent shared by all sessions using the same Netdata urls.
+
+    Only MAX_AGENTS are kept. A dropped agent is simply created again when needed, as conversations live in the shared store.
+    """
+    return NetdataLLMAgent(
+        list(netdata_urls),
+        conversation_store=get_conversation_store(),
+        max_history_messages=MAX_THREAD_MESSAGES,
+    )
+
+
+@st.cache_resource
+def get_active_threads() -> ActiveThreads:
+    """Threads of the live sessions, shared by all sessions."""
+    return ActiveThreads(SESSION_IDLE_SECONDS)
+
+
+def new_thread():
+    """Start a new conversation for this session, deleting the previous one from the store."""
+    if "thread_id" in st.session_state:
+        get_conversation_store().delete_thread(st.session_state.thread_id)
+        get_active_threads().discard(st.session_state.thread_id)
+    st.session_state.thread_id = str(uuid.uuid4())
+    st.session_state.conversation = []
+    st.session_state.thread_started = False
+
+
+def check_thread():
+    """
+    Keep this session's thread marked as active, and start a new conversation if the thread was pruned from the store while the session was idle, rather than carrying on with an empty context.
+    """
+    if st.session_state.get("thread_started") and not get_conversation_store().has_thread(
+        st.session_state.thread_id
+    ):
+        new_thread()
+        st.info("This conversation expired after being idle and was cleared, a new one has been started.")
+    get_active_threads().touch(st.session_state.thread_id)
+
 
 def init_session_state():
     """Initialize session state variables if not already set."""
     if "netdata_urls" not in st.session_state:
         st.session_state.netdata_urls = DEFAULT_NETDATA_URLS
-    if "agent" not in st.session_state:
-        st.session_state.agent = NetdataLLMAgent(st.session_state.netdata_urls)
-    if "conversation" not in st.session_state:
-        st.session_state.conversation = []
+    if "thread_id" not in st.session_state:
+        new_thread()
     if "reverse_chat" not in st.session_state:
         st.session_state.reverse_chat = False
     if "verbose_mode" not in st.session_state:
         st.session_state.verbose_mode = False
+    if "max_history" not in st.session_state:
+        st.session_state.max_history = DEFAULT_MAX_HISTORY
+    if "render_limit" not in st.session_state:
+        st.session_state.render_limit = DEFAULT_RENDER_LIMIT
 
 
 def sidebar_config():
-    """Render and handle sidebar configuration."""
+    """
+    Render and handle sidebar configuration.
+
+    Returns:
+        Placeholder to show the session memory usage in once the turn is done.
+    """
     st.sidebar.header("Configuration")
 
     netdata_url_input = st.sidebar.text_area(
@@ -48,8 +155,7 @@ def sidebar_config():
             url.strip() for url in netdata_url_input.splitlines() if url.strip()
         ]
         st.session_state.netdata_urls = new_urls
-        st.session_state.agent = NetdataLLMAgent(new_urls)
-        st.session_state.conversation = []
+        new_thread()
         st.rerun()
 
     st.sidebar.checkbox(
@@ -62,24 +168,77 @@ def sidebar_config():
         "Verbose Mode", key="verbose_mode", help="Toggle verbose output for debugging."
     )
 
+    st.sidebar.number_input(
+        "History Limit",
+        min_value=2,
+        step=10,
+        key="max_history",
+        help="Maximum number of messages kept in this session for display.",
+    )
+
+    st.sidebar.number_input(
+        "Messages Shown",
+        min_value=1,
+        step=10,
+        key="render_limit",
+        help="Maximum number of the most recent messages rendered.",
+    )
+
     if st.sidebar.button("Clear Chat"):
-        st.session_state.agent = NetdataLLMAgent(st.session_state.netdata_urls)
-        st.session_state.conversation = []
+        new_thread()
         st.rerun()
 
+    return st.sidebar.empty()
+
+
+def session_memory() -> dict:
+    """
+    Memory used by this session.
+
+    Returns:
+        Dict with messages, session_bytes (display records in session state), thread_bytes (this session's conversation in the store) and store_bytes (whole store, shared by all sessions).
+    """
+    conversation = st.session_state.conversation
+    store = get_conversation_store()
+    return {
+        "messages": len(conversation),
+        "session_bytes": sum(
+            len(r["content"].encode("utf-8")) + len((r.get("thinking") or "").encode("utf-8"))
+            for r in conversation
+        ),
+        "thread_bytes": store.thread_size_bytes(st.session_state.thread_id),
+        "store_bytes": store.size_bytes(),
+    }
+
+
+def render_message(record: dict):
+    """Display a single message record."""
+    with st.chat_message("user" if record["role"] == "user" else "assistant"):
+        if record.get("thinking"):
+            with st.expander("Thinking"):
+                st.text(record["thinking"])
+        st.markdown(record["content"])
+
 
 def render_conversation():
-    """Display the conversation history."""
-    conv = st.session_state.conversation.copy()
+    """Display the most recent messages of the conversation history, up to the render limit."""
+    conversation = st.session_state.conversation
+    start = max(len(conversation) - st.session_state.render_limit, 0)
+    indexes = range(start, len(conversation))
     if st.session_state.reverse_chat:
-        conv.reverse()
-    for chat in conv:
-        if chat["role"] == "user":
-            with st.chat_message("user"):
-                st.markdown(chat["content"])
-        else:
-            with st.chat_message("assistant"):
-                st.markdown(chat["content"])
+        indexes = reversed(indexes)
+    if start:
+        st.caption(f"{start} earlier messages not shown.")
+    for i in indexes:
+        render_message(conversation[i])
+
+
+def add_message(record: dict):
+    """Add a message record to the conversation history, dropping the oldest beyond the history limit."""
+    conversation = st.session_state.conversation
+    conversation.append(record)
+    if len(conversation) > st.session_state.max_history:
+        del conversation[: len(conversation) - st.session_state.max_history]
 
 
 def chat_input():
@@ -104,37 +263,46 @@ def main():
     )
 
     init_session_state()
-    sidebar_config()
+    check_thread()
+    memory_placeholder = sidebar_config()
 
     send_pressed, user_input = chat_input()
 
     if send_pressed and user_input:
-        st.session_state.conversation.append({"role": "user", "content": user_input})
-        continue_chat = len(st.session_state.conversation) > 1
+        add_message({"role": "user", "content": user_input})
+        agent = get_agent(tuple(st.session_state.netdata_urls))
 
         with st.spinner("Agent is thinking..."):
             try:
+                new_messages = agent.chat(
+                    user_input,
+                    continue_chat=True,
+                    return_thinking=True,
+                    thread_id=st.session_state.thread_id,
+                )
+                st.session_state.thread_started = True
+                record = {"role": "agent", "content": new_messages[-1].content}
                 if st.session_state.verbose_mode:
-                    response = st.session_state.agent.chat(
-                        user_input,
-                        continue_chat=continue_chat,
-                        return_thinking=True,
-                        return_last=False,
-                    )
-                else:
-                    response = st.session_state.agent.chat(
-                        user_input,
-                        continue_chat=continue_chat,
-                        return_last=True,
-                    )
+                    # keep a text rendering rather than the message objects
+                    record["thinking"] = "\n\n".join(m.pretty_repr() for m in new_messages[:-1])
             except Exception as e:
-                response = f"Error: {e}"
+                record = {"role": "agent", "content": f"Error: {e}"}
 
-        st.session_state.conversation.append({"role": "agent", "content": response})
-        st.rerun()
+        add_message(record)
+        get_conversation_store().prune(
+            max_threads=MAX_THREADS, keep=get_active_threads().snapshot()
+        )
 
     render_conversation()
 
+    memory = session_memory()
+    memory_placeholder.caption(
+        f"Session memory: {memory['messages']} messages, "
+        f"{memory['session_bytes'] / 1024:.1f} KB in session state, "
+        f"{memory['thread_bytes'] / 1024:.1f} KB in the conversation store "
+        f"({memory['store_bytes'] / 1024:.0f} KB shared by all sessions)."
+    )
+
 
 def run_app():
     """Entry point for the Streamlit app when run as a module."""
@@ -0,0 +1,323 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Answer cache for NetdataLLMAgent so repeated questions (across users) can be answered without a full agent run.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit
+
+
+# questions about what is happening right now go stale quickly
+LIVE_TERMS = (
+    "now",
+    "current",
+    "currently",
+    "active",
+    "alarm",
+    "alarms",
+    "alert",
+    "alerts",
+    "last",
+    "latest",
+    "recent",
+    "today",
+    "minute",
+    "minutes",
+)
+
+# questions about docs and concepts barely change
+STATIC_TERMS = (
+    "docs",
+    "documentation",
+    "install",
+    "installation",
+    "configure",
+    "configuration",
+)
+
+# words that tie a question to data on a host, so it is never treated as a docs question
+DATA_TERMS = (
+    "cpu",
+    "ram",
+    "memory",
+    "mem",
+    "disk",
+    "disks",
+    "space",
+    "network",
+    "load",
+    "usage",
+    "utilization",
+    "traffic",
+    "latency",
+    "metric",
+    "metrics",
+    "chart",
+    "charts",
+    "value",
+    "values",
+    "host",
+    "hosts",
+    "node",
+    "nodes",
+    "server",
+    "localhost",
+    "anomaly",
+    "anomalous",
+    "%",
+)
+
+# words that pick a different statistic of the same data, so questions differing in them need different answers
+QUALIFIER_TERMS = (
+    "min",
+    "minimum",
+    "lowest",
+    "low",
+    "least",
+    "max",
+    "maximum",
+    "highest",
+    "high",
+    "peak",
+    "most",
+    "top",
+    "bottom",
+    "avg",
+    "average",
+    "mean",
+    "median",
+    "percentile",
+    "total",
+    "sum",
+)
+
+# time units, with plurals and short forms mapped to one name
+TIME_UNITS = {
+    "s": "second", "sec": "second", "secs": "second", "second": "second", "seconds": "second",
+    "m": "minute", "min": "minute", "mins": "minute", "minute": "minute", "minutes": "minute",
+    "h": "hour", "hr": "hour", "hrs": "hour", "hour": "hour", "hours": "hour",
+    "d": "day", "day": "day", "days": "day", "today": "day", "yesterday": "day",
+    "w": "week", "week": "week", "weeks": "week",
+    "month": "month", "months": "month", "year": "year", "years": "year",
+}
+
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "on", "in", "of", "for", "to", "me", "my",
+    "please", "can", "you", "show", "tell", "what", "whats", "give", "list",
+    "and", "with", "at", "by", "do", "does", "there", "any",
+}
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for cache lookups: lowercase, drop punctuation and collapse whitespace.
+
+    Args:
+        question: Question text.
+
+    Returns:
+        Normalized question.
+    """
+    question = re.sub(r"[^\w\s%./-]", " ", question.lower())
+    return " ".join(question.split())
+
+
+def _host_names(netdata_host_urls: list) -> tuple:
+    """Host names of urls, with and without trailing digits, e.g. ('london3', 'london')."""
+    names = set()
+    for url in netdata_host_urls:
+        name = urlsplit(url if "//" in url else f"//{url}").hostname or ""
+        name = name.split(".")[0].lower()
+        if name:
+            names.update([name, name.rstrip("0123456789")])
+    return tuple(n for n in names if n)
+
+
+def _anchors(normalized: str, host_names: tuple) -> frozenset:
+    """
+    Terms of a normalized question that similar questions must agree on exactly: numbers, time units, host names and min/max style qualifiers.
+    """
+    anchors = set()
+    for term in normalized.split():
+        if any(c.isdigit() for c in term):
+            anchors.add(term)
+        elif term in TIME_UNITS:
+            anchors.add(TIME_UNITS[term])
+        elif term in host_names or term in QUALIFIER_TERMS:
+            anchors.add(term)
+    return frozenset(anchors)
+
+
+def _terms(normalized: str) -> Counter:
+    """Term counts for a normalized question, ignoring stop words."""
+    return Counter(t for t in normalized.split() if t not in STOP_WORDS)
+
+
+class AnswerCache:
+    """
+    AnswerCache stores final agent answers keyed by normalized question, host set and time bucket.
+
+    Each question is given a TTL based on how fresh the underlying data needs to be (live_ttl_seconds for questions about current state, static_ttl_seconds for docs style questions, ttl_seconds otherwise). Entries are only reused within the same time bucket of that TTL, so e.g. "active alarms" answers roll over every live_ttl_seconds. Optionally, near-identical questions can be matched using TF-IDF cosine similarity over the cached questions. A similar question is only matched if it has exactly the same numbers, time units, host names and min/max style qualifiers, as with few cached entries a single differing word barely changes the score.
+
+    Args:
+        ttl_seconds: Default TTL for answers. Default is 300.
+        live_ttl_seconds: TTL for questions about current state (alarms, current values, recent ranges). Default is 60.
+        static_ttl_seconds: TTL for docs and concept questions. Default is 86400.
+        similarity_threshold: If set, reuse an answer for a different question whose TF-IDF cosine similarity is at least this value and that agrees on numbers, time units, host names and qualifiers. Default is None (exact normalized match only).
+        max_entries: Maximum number of cached answers, least recently used are evicted first. Default is 1000.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        live_ttl_seconds: int = 60,
+        static_ttl_seconds: int = 86400,
+        similarity_threshold: float = None,
+        max_entries: int = 1000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.live_ttl_seconds = live_ttl_seconds
+        self.static_ttl_seconds = static_ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def ttl_for(self, question: str, netdata_host_urls: list = None) -> int:
+        """
+        Get the TTL to use for a question based on how fresh its data needs to be.
+
+        A question only gets static_ttl_seconds if it asks about docs, installation or configuration and mentions no metrics, charts or hosts.
+
+        Args:
+            question: Question text.
+            netdata_host_urls: Host urls the question is asked against, their host names (e.g. 'london' for https://london3.my-netdata.io/) count as host words.
+
+        Returns:
+            TTL in seconds.
+        """
+        words = set(normalize_question(question).replace("%", " % ").split())
+        if words.intersection(LIVE_TERMS):
+            return self.live_ttl_seconds
+        if words.intersection(STATIC_TERMS) and not words.intersection(
+            DATA_TERMS + _host_names(netdata_host_urls or [])
+        ):
+            return self.static_ttl_seconds
+        return self.ttl_seconds
+
+    def _key(self, normalized: str, netdata_host_urls: list, ttl: int, now: float) -> tuple:
+        """Cache key of normalized question, host set and time bucket."""
+        hosts = tuple(sorted(url.rstrip("/") for url in netdata_host_urls))
+        return normalized, hosts, ttl, int(now // ttl)
+
+    def get(self, question: str, netdata_host_urls: list):
+        """
+        Look up a cached answer.
+
+        Args:
+            question: Question text.
+            netdata_host_urls: Host urls the question is asked against.
+
+        Returns:
+            The cached answer or None.
+        """
+        now = time.time()
+        normalized = normalize_question(question)
+        ttl = self.ttl_for(question, netdata_host_urls)
+        key = self._key(normalized, netdata_host_urls, ttl, now)
+        with self.lock:
+            self._evict_expired(now)
+            entry = self.entries.get(key)
+            if entry is None and self.similarity_threshold is not None:
+                entry = self._most_similar(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(entry["key"])
+            self.hits += 1
+            return entry["answer"]
+
+    def put(self, question: str, netdata_host_urls: list, answer: str):
+        """
+        Cache an answer.
+
+        Args:
+            question: Question text.
+            netdata_host_urls: Host urls the question was asked against.
+            answer: Final answer to cache.
+        """
+        now = time.time()
+        ttl = self.ttl_for(question, netdata_host_urls)
+        key = self._key(normalize_question(question), netdata_host_urls, ttl, now)
+        with self.lock:
+            self.entries[key] = {
+                "key": key,
+                "answer": answer,
+                "terms": _terms(key[0]),
+                "anchors": _anchors(key[0], _host_names(netdata_host_urls)),
+                "expires_at": now + ttl,
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached answers."""
+        with self.lock:
+            self.entries.clear()
+
+    def _evict_expired(self, now: float):
+        """Drop entries past their TTL."""
+        for key in [k for k, e in self.entries.items() if e["expires_at"] <= now]:
+            del self.entries[key]
+
+    def _most_similar(self, key: tuple):
+        """
+        Find the cached entry for the same hosts and time bucket whose question is most similar by TF-IDF cosine, if above similarity_threshold and with the same anchor terms (see _anchors()).
+        """
+        anchors = _anchors(key[0], _host_names(key[1]))
+        candidates = [
+            e for k, e in self.entries.items() if k[1:] == key[1:] and e["anchors"] == anchors
+        ]
+        if not candidates:
+            return None
+
+        n_docs = len(self.entries) + 1
+        doc_freq = Counter()
+        for entry in self.entries.values():
+            doc_freq.update(entry["terms"].keys())
+
+        def vector(terms):
+            return {
+                t: c * (math.log((1 + n_docs) / (1 + doc_freq[t])) + 1) for t, c in terms.items()
+            }
+
+        def norm(v):
+            return math.sqrt(sum(x * x for x in v.values()))
+
+        query = vector(_terms(key[0]))
+        query_norm = norm(query)
+        if not query_norm:
+            return None
+
+        best, best_score = None, 0.0
+        for entry in candidates:
+            v = vector(entry["terms"])
+            v_norm = norm(v)
+            if not v_norm:
+                continue
+            score = sum(w * v.get(t, 0.0) for t, w in query.items()) / (query_norm * v_norm)
+            if score > best_score:
+                best, best_score = entry, score
+
+        if best_score >= self.similarity_threshold:
+            return best
+        return None
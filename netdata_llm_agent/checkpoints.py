@@ -0,0 +1,231 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite backed conversation store for persisting NetdataLLMAgent conversations as LangGraph checkpoints.
+"""
+
+import sqlite3
+import time
+
+
+# bytes stored for the thread in the enclosing query's {thread_id} column or parameter
+THREAD_BYTES_SQL = """
+    COALESCE((SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints c WHERE c.thread_id = {thread_id}), 0)
+    + COALESCE((SELECT SUM(LENGTH(value)) FROM writes w WHERE w.thread_id = {thread_id}), 0)
+"""
+
+
+class ConversationStore:
+    """
+    ConversationStore persists agent conversations in SQLite via the LangGraph SqliteSaver checkpointer and keeps a small threads table so conversations can be listed, resumed and pruned.
+
+    LangGraph writes a checkpoint for every step of the ReAct loop, each holding the full state. Once a turn has completed only the latest checkpoint is needed to resume, so compact_thread() drops the intermediate ones and storage grows with the conversation rather than with the number of steps.
+
+    Args:
+        db_path: Path to the SQLite database file. Use ':memory:' for a process-local store. Default is ':memory:'.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.saver = SqliteSaver(self.conn)
+        self.saver.setup()
+        with self.saver.lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_id TEXT PRIMARY KEY,
+                    title TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    turns INTEGER NOT NULL DEFAULT 0,
+                    messages INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self.conn.commit()
+
+    def record_turn(self, thread_id: str, title: str, messages: int):
+        """
+        Record a completed turn for a thread, creating the thread entry if needed.
+
+        Args:
+            thread_id: Thread id.
+            title: Title to use if the thread is new, usually the first question.
+            messages: Number of messages in the thread after the turn.
+        """
+        now = time.time()
+        with self.saver.lock:
+            self.conn.execute(
+                """
+                INSERT INTO threads (thread_id, title, created_at, updated_at, turns, messages)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT(thread_id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    turns = turns + 1,
+                    messages = excluded.messages
+                """,
+                (thread_id, title[:200], now, now, messages),
+            )
+            self.conn.commit()
+
+    def compact_thread(self, thread_id: str, keep: int = 1):
+        """
+        Delete all but the latest checkpoints (and their pending writes) for a thread.
+
+        Args:
+            thread_id: Thread id.
+            keep: Number of most recent checkpoints to keep. Default is 1.
+        """
+        with self.saver.lock:
+            for table in ("writes", "checkpoints"):
+                self.conn.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE thread_id = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = ?
+                        ORDER BY checkpoint_id DESC
+                        LIMIT ?
+                    )
+                    """,
+                    (thread_id, thread_id, keep),
+                )
+            self.conn.commit()
+
+    def delete_thread(self, thread_id: str):
+        """
+        Delete a thread and all of its checkpoints.
+
+        Args:
+            thread_id: Thread id.
+        """
+        with self.saver.lock:
+            for table in ("writes", "checkpoints", "threads"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self.conn.commit()
+
+    def has_thread(self, thread_id: str) -> bool:
+        """
+        Check if a thread has a completed turn recorded, i.e. it was not deleted or pruned.
+
+        Args:
+            thread_id: Thread id.
+        """
+        with self.saver.lock:
+            return (
+                self.conn.execute(
+                    "SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                is not None
+            )
+
+    def list_threads(self, limit: int = 50) -> list:
+        """
+        List the most recently updated threads.
+
+        Args:
+            limit: Maximum number of threads to return. Default is 50.
+
+        Returns:
+            List of dicts with thread_id, title, created_at, updated_at, turns and messages.
+        """
+        with self.saver.lock:
+            rows = self.conn.execute(
+                """
+                SELECT thread_id, title, created_at, updated_at, turns, messages
+                FROM threads
+                ORDER BY updated_at DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        keys = ["thread_id", "title", "created_at", "updated_at", "turns", "messages"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def prune(
+        self,
+        max_age_seconds: float = None,
+        max_threads: int = None,
+        max_bytes: int = None,
+        keep: set = None,
+        vacuum: bool = False,
+    ) -> int:
+        """
+        Delete threads that have not been updated for max_age_seconds, and/or the oldest threads beyond max_threads or beyond max_bytes of stored conversations.
+
+        Freed pages are reused for new checkpoints, so the file only shrinks on disk with vacuum=True. VACUUM rewrites the whole database while every other write waits, so only use it off the request path, e.g. on startup.
+
+        Args:
+            max_age_seconds: Delete threads not updated within this many seconds.
+            max_threads: Keep at most this many of the most recently updated threads.
+            max_bytes: Keep the most recently updated threads whose checkpoints add up to at most this many bytes (see thread_size_bytes()).
+            keep: Thread ids never to delete, e.g. threads in use. They still count towards max_threads and max_bytes.
+            vacuum: If True, vacuum a file database after deleting so it shrinks on disk. Default is False.
+
+        Returns:
+            Number of threads deleted.
+        """
+        with self.saver.lock:
+            stale = set()
+            if max_age_seconds is not None:
+                cutoff = time.time() - max_age_seconds
+                stale.update(
+                    row[0]
+                    for row in self.conn.execute(
+                        "SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)
+                    )
+                )
+            if max_threads is not None:
+                stale.update(
+                    row[0]
+                    for row in self.conn.execute(
+                        "SELECT thread_id FROM threads ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                        (max_threads,),
+                    )
+                )
+            if max_bytes is not None:
+                total = 0
+                for thread_id, size in self.conn.execute(
+                    f"""
+                    SELECT thread_id, {THREAD_BYTES_SQL.format(thread_id="t.thread_id")}
+                    FROM threads t
+                    ORDER BY updated_at DESC
+                    """
+                ).fetchall():
+                    total += size
+                    if total > max_bytes:
+                        stale.add(thread_id)
+        stale.difference_update(keep or ())
+        for thread_id in stale:
+            self.delete_thread(thread_id)
+        if vacuum and stale and self.db_path != ":memory:":
+            with self.saver.lock:
+                self.conn.execute("VACUUM")
+
+        return len(stale)
+
+    def size_bytes(self) -> int:
+        """
+        Get the current size of the database in bytes.
+        """
+        with self.saver.lock:
+            page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+
+        return page_count * page_size
+
+    def thread_size_bytes(self, thread_id: str) -> int:
+        """
+        Get the size in bytes of the checkpoints and pending writes stored for a thread.
+
+        Args:
+            thread_id: Thread id.
+        """
+        with self.saver.lock:
+            return self.conn.execute(
+                f"SELECT {THREAD_BYTES_SQL.format(thread_id='?')}", (thread_id, thread_id)
+            ).fetchone()[0]
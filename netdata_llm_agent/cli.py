@@ -13,6 +13,7 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 from netdata_llm_agent.agent import NetdataLLMAgent
+from netdata_llm_agent.cache import AnswerCache
 from enum import Enum
 
 load_dotenv()
@@ -52,6 +53,62 @@ def parse_args():
         type=str,
         help="Optional question to ask the agent. If provided, the agent will answer this question and exit.",
     )
+    parser.add_argument(
+        "--host-inventory",
+        action="store_true",
+        help="Precompute a compact inventory of each host and include it in the system prompt to save discovery calls.",
+    )
+    parser.add_argument(
+        "--router-model",
+        type=str,
+        help="Optional fast model for intermediate tool calling steps, the main model writes the final answer.",
+    )
+    parser.add_argument(
+        "--router-platform",
+        type=str,
+        help="Platform of the router model (openai, anthropic or ollama). Defaults to the main model's platform.",
+    )
+    parser.add_argument(
+        "--show-usage",
+        action="store_true",
+        help="Print token usage (including prompt cache hits) and model routing after each answer.",
+    )
+    parser.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Answer repeated standalone questions from a cache instead of re-running the agent.",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        type=str,
+        default=os.environ.get("NETDATA_LLM_CHECKPOINT_DB"),
+        help="SQLite database to persist conversations in so they can be resumed. "
+        "Defaults to NETDATA_LLM_CHECKPOINT_DB from the .env file if set.",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        help="Thread id of a persisted conversation to resume (requires --checkpoint-db).",
+    )
+    parser.add_argument(
+        "--list-threads",
+        action="store_true",
+        help="List persisted conversations (requires --checkpoint-db) and exit.",
+    )
+    parser.add_argument(
+        "--prune-days",
+        type=float,
+        default=float(os.environ.get("NETDATA_LLM_PRUNE_DAYS", 30)),
+        help="On startup, delete persisted conversations not updated for this many days. "
+        "Defaults to NETDATA_LLM_PRUNE_DAYS or 30.",
+    )
+    parser.add_argument(
+        "--max-db-mb",
+        type=float,
+        default=os.environ.get("NETDATA_LLM_MAX_DB_MB"),
+        help="On startup, delete the oldest persisted conversations beyond this many MB. "
+        "Defaults to NETDATA_LLM_MAX_DB_MB if set.",
+    )
     return parser.parse_args()
 
 
@@ -73,6 +130,22 @@ def print_and_save_message(message, chat_history, separator=True, is_markdown=Fa
     chat_history.append(SEPARATOR_TEXT)
 
 
+def print_usage(usage, routing):
+    """Print the token usage and model routing of the last turn."""
+    console.print(
+        f"llm calls: {usage['llm_calls']}, input tokens: {usage['input_tokens']} "
+        f"(cached: {usage['cached_input_tokens']}, uncached: {usage['uncached_input_tokens']}), "
+        f"output tokens: {usage['output_tokens']}",
+        style="dim",
+    )
+    if routing["fast_steps"] or routing["strong_steps"]:
+        console.print(
+            f"fast steps: {routing['fast_steps']}, strong steps: {routing['strong_steps']}, "
+            f"escalations: {routing['escalations']}, latency saved: {routing['latency_saved']:.2f}s",
+            style="dim",
+        )
+
+
 def get_chat_title(agent, chat_history):
     """
     Get a short descriptive title for the chat from the agent.
@@ -94,12 +167,8 @@ def get_chat_title(agent, chat_history):
             if not line.startswith("─") and not line.startswith("Chat history saved")
         )
 
-        title = agent.chat(
-            chat_summary + "\n" + prompt,
-            return_last=True,
-            no_print=True,
-            continue_chat=False
-        )
+        # ask the llm directly so the title request does not replace (or get persisted into) the conversation
+        title = agent.llm.invoke(chat_summary + "\n" + prompt).content
 
         clean_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in title)
         clean_title = clean_title.strip().replace(" ", "_")
@@ -144,7 +213,15 @@ class ChatCLI:
 
     def _handle_reset(self):
         self.chat_history.clear()
-        self.agent = NetdataLLMAgent(netdata_host_urls=self.agent.netdata_host_urls, model=self.agent.model)
+        self.agent = NetdataLLMAgent(
+            netdata_host_urls=self.agent.netdata_host_urls,
+            model=self.agent.model,
+            host_inventory=self.agent.host_inventory,
+            conversation_store=self.agent.conversation_store,
+            answer_cache=self.agent.answer_cache,
+            router_model=self.agent.router_model,
+            router_platform=self.agent.router_platform,
+        )
         self.console.print("[green]Chat history cleared and agent reinitialized![/green]")
         self.chat_history.add_message("Chat history cleared and agent reinitialized!")
 
@@ -168,9 +245,10 @@ class ChatCLI:
         """Add a user message to the chat history."""
         self.chat_history.add_message(f"You: {message}\n", separator=True, quiet=True)
 
-    def add_agent_message(self, message):
-        """Add an agent message to the chat history."""
-        self.chat_history.add_message(f"Agent: {message}\n", is_markdown=True)
+    def add_agent_message(self, message, cached=False):
+        """Add an agent message to the chat history, labelled if it was answered from the answer cache."""
+        label = "Agent (cached)" if cached else "Agent"
+        self.chat_history.add_message(f"{label}: {message}\n", is_markdown=True)
 
 
 class ChatHistory:
@@ -221,13 +299,44 @@ class ChatHistory:
 def main():
     """Main function for the CLI."""
     args = parse_args()
-    agent = NetdataLLMAgent(netdata_host_urls=args.host, model=args.model)
+    agent = NetdataLLMAgent(
+        netdata_host_urls=args.host,
+        model=args.model,
+        host_inventory=args.host_inventory,
+        checkpoint_db=args.checkpoint_db,
+        answer_cache=AnswerCache() if args.answer_cache else None,
+        router_model=args.router_model,
+        router_platform=args.router_platform,
+    )
     cli = ChatCLI(agent)
 
+    if agent.conversation_store is not None:
+        agent.conversation_store.prune(
+            max_age_seconds=args.prune_days * 86400 if args.prune_days else None,
+            max_bytes=int(float(args.max_db_mb) * 1024 * 1024) if args.max_db_mb else None,
+            # nothing else uses the database yet, so this is the place to shrink it
+            vacuum=True,
+        )
+
+    if args.list_threads:
+        for thread in agent.list_threads():
+            updated = datetime.fromtimestamp(thread["updated_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            console.print(f"{thread['thread_id']}  {updated}  turns={thread['turns']}  {thread['title']}")
+        return
+
+    if args.resume:
+        agent.resume(args.resume)
+        console.print(f"[green]Resumed conversation {args.resume} ({len(agent.messages['messages'])} messages).[/green]")
+
     if args.question:
         try:
-            response = agent.chat(args.question, return_last=True, no_print=True)
-            cli.add_agent_message(response)
+            response = agent.chat(
+                args.question,
+                return_last=True,
+                no_print=True,
+                continue_chat=bool(args.resume),
+            )
+            cli.add_agent_message(response, cached=agent.last_answer_cached)
         except Exception as e:
             error_msg = f"An error occurred while processing your question: {e}\n"
             console.print(f"[red]{error_msg}[/red]")
@@ -264,7 +373,9 @@ def main():
             response = agent.chat(
                 user_input, return_last=True, no_print=True, continue_chat=True
             )
-            cli.add_agent_message(response)
+            cli.add_agent_message(response, cached=agent.last_answer_cached)
+            if args.show_usage:
+                print_usage(agent.last_usage, agent.last_routing)
         except Exception as e:
             error_msg = f"An error occurred while processing your request: {e}\n"
             console.print(f"[red]{error_msg}[/red]")
@@ -0,0 +1,260 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Shared HTTP client for the Netdata LLM Agent tools.
+
+All tools go through http_get() so that every agent, session and thread in the process shares one pool of keep-alive connections per host, and per host:
+- concurrent requests are limited,
+- identical requests already in flight are coalesced into one (single-flight),
+- requests are rate limited with a token bucket,
+- a circuit breaker fails fast on hosts that keep failing instead of waiting out the timeout on every call.
+
+A multi-user deployment can restrict the urls the tools may fetch with set_allowed_urls(), so a user can't get the agent to request internal urls.
+"""
+
+import copy
+import os
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# max concurrent requests in flight to a single host across the whole process
+HOST_CONCURRENCY = int(os.environ.get("NETDATA_HOST_CONCURRENCY", 8))
+# sustained requests per second and burst size allowed per host, a rate of 0 or less disables rate limiting
+HOST_RATE = float(os.environ.get("NETDATA_HOST_RATE", 10))
+HOST_BURST = int(os.environ.get("NETDATA_HOST_BURST", 20))
+# consecutive failures before a host is considered down, and seconds to wait before trying it again
+BREAKER_THRESHOLD = int(os.environ.get("NETDATA_BREAKER_THRESHOLD", 3))
+BREAKER_COOLDOWN = float(os.environ.get("NETDATA_BREAKER_COOLDOWN", 30))
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(HOST_CONCURRENCY, 10))
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+
+class HostUnavailableError(requests.exceptions.ConnectionError):
+    """Raised without making a request when a host's circuit breaker is open."""
+
+
+class UrlNotAllowedError(requests.exceptions.InvalidURL):
+    """Raised without making a request when a url is not under one of the allowed urls."""
+
+
+# url prefixes requests are restricted to, None for no restriction
+_allowed_urls = None
+
+
+def set_allowed_urls(urls: list):
+    """
+    Restrict all requests, including redirects, to urls on the same scheme and host and under the path of one of the given urls.
+
+    Args:
+        urls: Allowed url prefixes, e.g. Netdata host urls and the docs site. None to allow any url.
+    """
+    global _allowed_urls
+    _allowed_urls = None if urls is None else [urlsplit(url) for url in urls]
+
+
+def is_allowed_url(url: str) -> bool:
+    """Check if a url may be requested, see set_allowed_urls()."""
+    if _allowed_urls is None:
+        return True
+    parts = urlsplit(url)
+    return any(
+        parts.scheme == allowed.scheme
+        and parts.netloc == allowed.netloc
+        and parts.path.startswith(allowed.path.rstrip("/"))
+        for allowed in _allowed_urls
+    )
+
+
+def _check_url(url: str):
+    if not is_allowed_url(url):
+        raise UrlNotAllowedError(f"Requests to {url} are not allowed.")
+
+
+def _check_redirect(response, *args, **kwargs):
+    """Response hook refusing to follow a redirect to a url that is not allowed."""
+    if response.is_redirect:
+        _check_url(urljoin(response.url, response.headers["location"]))
+
+
+class TokenBucket:
+    """
+    TokenBucket rate limiter, refilling `rate` tokens per second up to `burst`.
+
+    Args:
+        rate: Tokens added per second, 0 or less for no limit.
+        burst: Maximum number of tokens, at least 1.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        # a bucket that can't hold a whole token would never let a request through
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker that opens after `threshold` consecutive failures and lets a single trial request through once `cooldown` seconds have passed.
+
+    Args:
+        threshold: Consecutive failures before opening.
+        cooldown: Seconds to stay open before allowing a trial request.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check if a request may be made."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_flight or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record(self, success: bool):
+        """Record the outcome of a request."""
+        with self.lock:
+            self.trial_in_flight = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class _Call:
+    """An in-flight request that identical concurrent requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class _Host:
+    """Per host limits and state."""
+
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(HOST_CONCURRENCY)
+        self.bucket = TokenBucket(HOST_RATE, HOST_BURST)
+        self.breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+_hosts = {}
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _host(netloc: str) -> _Host:
+    """Get (or create) the state for a host."""
+    with _lock:
+        if netloc not in _hosts:
+            _hosts[netloc] = _Host()
+        return _hosts[netloc]
+
+
+def _request(host: _Host, netloc: str, url: str, params: dict, timeout: float):
+    """Make a request subject to the host's circuit breaker, rate limit and concurrency limit."""
+    if not host.breaker.allow():
+        raise HostUnavailableError(
+            f"{netloc} is unavailable after repeated failures, not retrying for up to {BREAKER_COOLDOWN:.0f}s."
+        )
+    host.bucket.acquire()
+    kwargs = {"hooks": {"response": _check_redirect}} if _allowed_urls is not None else {}
+    try:
+        with host.semaphore:
+            resp = _session.get(url, params=params, timeout=timeout, **kwargs)
+    except UrlNotAllowedError:
+        # the host answered, with a redirect that was refused
+        host.breaker.record(True)
+        raise
+    except requests.exceptions.RequestException:
+        host.breaker.record(False)
+        raise
+    host.breaker.record(resp.status_code < 500)
+
+    return resp
+
+
+def http_get(url: str, params: dict = None, timeout: float = 5) -> requests.Response:
+    """
+    GET a url using the shared session and the per host limits.
+
+    If an identical request (same url and params) is already in flight, wait for it and share its response instead of making another one.
+
+    Args:
+        url: Url to get.
+        params: Optional query params.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        The response.
+
+    Raises:
+        HostUnavailableError: If the host's circuit breaker is open.
+        UrlNotAllowedError: If the url is not allowed, see set_allowed_urls().
+    """
+    _check_url(url)
+    netloc = urlsplit(url).netloc
+    host = _host(netloc)
+    key = (url, tuple(sorted((params or {}).items())))
+
+    with _lock:
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            # raise a copy so tracebacks from different threads don't pile up on one exception
+            raise copy.copy(call.error)
+        return call.response
+
+    try:
+        call.response = _request(host, netloc, url, params, timeout)
+        return call.response
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        call.done.set()
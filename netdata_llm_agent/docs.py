@@ -0,0 +1,326 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fast HTML to markdown extraction for Netdata Learn (docs site) pages.
+
+Uses a single streaming pass of the stdlib HTMLParser (no DOM is built) that keeps only the main article, drops navigation, sidebars, footers and script noise, and can return just selected sections by heading.
+
+Run as a module to benchmark against markdownify on saved pages:
+
+    python -m netdata_llm_agent.docs page1.html page2.html
+"""
+
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+
+# tags whose content is never useful to the model
+SKIP_TAGS = {
+    "script", "style", "noscript", "svg", "nav", "footer", "aside",
+    "form", "button", "iframe", "template", "head",
+}
+
+# class names (substrings) of boilerplate blocks on the docs site
+SKIP_CLASSES = (
+    "navbar", "sidebar", "breadcrumbs", "pagination", "table-of-contents",
+    "theme-doc-toc", "theme-doc-footer", "theme-edit-this-page", "hash-link",
+    "skip-to-content", "announcement",
+)
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+}
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "blockquote", "ul", "ol", "table",
+    "dl", "dt", "dd", "details", "summary", "figure",
+}
+
+HEADING_RE = re.compile(r"^(#{1,6}) (.*)$")
+
+
+class _MarkdownExtractor(HTMLParser):
+    """Streaming HTML to markdown converter that only keeps content inside the content root."""
+
+    def __init__(self, base_url: str = None, root_tag: str = None):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.root_tag = root_tag
+        self.root_depth = 0 if root_tag is None else None
+        # whether the content root was ever entered, a tag name found only in a script or comment never is
+        self.entered = root_tag is None
+        self.skip_depth = None
+        self.stack = []
+        self.out = []
+        self.pre = 0
+        self.lists = []
+        self.href = None
+
+    def _in_content(self) -> bool:
+        return self.root_depth is not None and self.skip_depth is None
+
+    def _emit(self, text: str):
+        if self._in_content():
+            self.out.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._emit("\n")
+            return
+        self.stack.append(tag)
+        depth = len(self.stack)
+        attrs = dict(attrs)
+
+        if self.root_depth is None:
+            if self.root_tag is not None and tag == self.root_tag:
+                self.root_depth = depth
+                self.entered = True
+            return
+        if self.skip_depth is not None:
+            return
+        classes = attrs.get("class") or ""
+        if tag in SKIP_TAGS or any(c in classes for c in SKIP_CLASSES):
+            self.skip_depth = depth
+            return
+
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self._emit(f"\n\n{'#' * int(tag[1])} ")
+        elif tag == "pre":
+            self.pre += 1
+            self._emit("\n\n```\n")
+        elif tag == "code" and not self.pre:
+            self._emit("`")
+        elif tag in ("ul", "ol"):
+            self.lists.append(tag)
+            if len(self.lists) == 1:
+                self._emit("\n")
+        elif tag == "li":
+            indent = "  " * max(len(self.lists) - 1, 0)
+            self._emit(f"\n{indent}- ")
+        elif tag == "tr":
+            self._emit("\n|")
+        elif tag in ("td", "th"):
+            self._emit(" ")
+        elif tag == "a":
+            href = attrs.get("href")
+            if href and not href.startswith("#"):
+                self.href = urljoin(self.base_url, href) if self.base_url else href
+                self._emit("[")
+        elif tag in BLOCK_TAGS:
+            self._emit("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self.stack:
+            return
+        # pop up to and including the matching tag, tolerating unclosed children
+        while self.stack:
+            depth = len(self.stack)
+            open_tag = self.stack.pop()
+            if self.skip_depth is not None:
+                if depth == self.skip_depth:
+                    self.skip_depth = None
+            elif self.root_depth is not None and depth == self.root_depth and self.root_tag:
+                # leaving the content root, ignore everything after it
+                self.root_depth = None
+                self.root_tag = None
+            elif self.root_depth is not None:
+                self._close(open_tag)
+            if open_tag == tag:
+                return
+
+    def _close(self, tag):
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self._emit("\n\n")
+        elif tag == "pre":
+            self.pre = max(self.pre - 1, 0)
+            self._emit("\n```\n\n")
+        elif tag == "code" and not self.pre:
+            self._emit("`")
+        elif tag in ("ul", "ol"):
+            if self.lists:
+                self.lists.pop()
+            if not self.lists:
+                self._emit("\n")
+        elif tag in ("td", "th"):
+            self._emit(" |")
+        elif tag == "a" and self.href:
+            self._emit(f"]({self.href})")
+            self.href = None
+        elif tag in BLOCK_TAGS:
+            self._emit("\n\n")
+
+    def handle_data(self, data):
+        data = data.replace("\u200b", "")
+        if not self.pre:
+            data = re.sub(r"\s+", " ", data)
+        self._emit(data)
+
+    def markdown(self) -> str:
+        lines = []
+        in_code = False
+        for line in "".join(self.out).split("\n"):
+            if line.startswith("```"):
+                in_code = not in_code
+            elif not in_code:
+                # tidy whitespace left over from inline elements, keeping list indentation
+                stripped = line.strip()
+                indent = line[: len(line) - len(line.lstrip())] if stripped.startswith("- ") else ""
+                line = indent + re.sub(r" {2,}", " ", stripped)
+            lines.append(line.rstrip())
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_markdown(html: str, base_url: str = None) -> str:
+    """
+    Convert the main content of a docs page to markdown, dropping navigation and other boilerplate.
+
+    Args:
+        html: Page HTML.
+        base_url: Url of the page, used to make relative links absolute.
+
+    Returns:
+        Markdown of the main article (or main element, or whole body if neither exists).
+    """
+    # the substring check is only a cheap filter, the tag may just be mentioned in a script or comment
+    candidates = [t for t in ("article", "main") if f"<{t}" in html] + [None]
+    for root_tag in candidates:
+        parser = _MarkdownExtractor(base_url=base_url, root_tag=root_tag)
+        parser.feed(html)
+        parser.close()
+        if parser.entered:
+            return parser.markdown()
+
+
+def split_sections(markdown: str) -> list:
+    """
+    Split markdown into sections by heading.
+
+    Args:
+        markdown: Markdown text.
+
+    Returns:
+        List of (level, heading, text) tuples, text including the heading line. Content before the first heading has level 0 and an empty heading.
+    """
+    sections = [[0, "", []]]
+    in_code = False
+    for line in markdown.split("\n"):
+        if line.startswith("```"):
+            in_code = not in_code
+        match = None if in_code else HEADING_RE.match(line)
+        if match:
+            sections.append([len(match.group(1)), match.group(2).strip(), []])
+        sections[-1][2].append(line)
+
+    return [(level, heading, "\n".join(lines).strip()) for level, heading, lines in sections]
+
+
+def select_sections(markdown: str, sections: list) -> str:
+    """
+    Keep only the sections whose heading contains one of the given terms (case insensitive), including their subsections.
+
+    Args:
+        markdown: Markdown text.
+        sections: List of heading search terms.
+
+    Returns:
+        Markdown of the matching sections, empty if none match.
+    """
+    terms = [s.strip().lower() for s in sections if s.strip()]
+    selected = []
+    keep_level = None
+    for level, heading, text in split_sections(markdown):
+        if keep_level is not None and level > keep_level:
+            selected.append(text)
+            continue
+        keep_level = None
+        if level and any(t in heading.lower() for t in terms):
+            keep_level = level
+            selected.append(text)
+
+    return "\n\n".join(selected)
+
+
+def outline(markdown: str) -> str:
+    """
+    List the headings of some markdown, indented by level.
+
+    Args:
+        markdown: Markdown text.
+
+    Returns:
+        Outline text.
+    """
+    return "\n".join(
+        f"{'  ' * (level - 1)}- {heading}"
+        for level, heading, _ in split_sections(markdown)
+        if level
+    )
+
+
+def extract_docs_page(
+    html: str, base_url: str = None, sections: str = None, max_chars: int = 20000
+) -> str:
+    """
+    Extract a docs page as markdown, optionally only the selected sections and capped in length.
+
+    Args:
+        html: Page HTML.
+        base_url: Url of the page, used to make relative links absolute.
+        sections: Optional comma separated heading search terms to only return those sections.
+        max_chars: Maximum number of characters to return. Default is 20000.
+
+    Returns:
+        Markdown of the page (or selected sections). If sections match nothing or the output is truncated, the page outline is appended so specific sections can be requested.
+    """
+    markdown = html_to_markdown(html, base_url=base_url)
+    text = markdown
+    if sections:
+        text = select_sections(markdown, sections.split(","))
+        if not text:
+            return f"No sections matching '{sections}'. Available sections:\n{outline(markdown)}"
+
+    if max_chars and len(text) > max_chars:
+        cut = text.rfind("\n\n", 0, max_chars)
+        cut = cut if cut > max_chars // 2 else max_chars
+        text = (
+            f"{text[:cut]}\n\n[truncated {len(text) - cut} more characters, "
+            f"use the sections param to get specific sections. Available sections:\n{outline(markdown)}]"
+        )
+
+    return text
+
+
+def benchmark(paths: list):
+    """
+    Compare parse time and output size (approximate tokens) of markdownify over the full page against extract_docs_page on saved HTML pages.
+
+    Args:
+        paths: Paths to saved HTML pages.
+    """
+    from markdownify import markdownify as md
+
+    from netdata_llm_agent.inventory import estimate_tokens
+
+    print(f"{'page':40} {'md ms':>8} {'md tokens':>10} {'new ms':>8} {'new tokens':>10}")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        start = time.perf_counter()
+        old = md(html)
+        old_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        new = extract_docs_page(html, max_chars=None)
+        new_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{path[-40:]:40} {old_ms:8.1f} {estimate_tokens(old):10} {new_ms:8.1f} {estimate_tokens(new):10}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1:])
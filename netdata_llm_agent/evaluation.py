@@ -0,0 +1,455 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Evaluation harness that replays the questions from the saved chats in example_chats/ against recorded Netdata fixtures.
+
+Each transcript is replayed as one conversation. Per question, it records the agent steps, the tool calls, the token usage, the wall time and the answer. The results are compared with a stored baseline, and the exit code is nonzero if any metric regressed beyond its tolerance, the tools called changed, or the answer to a question of a good_ transcript changed.
+
+The Netdata (and docs site) responses are recorded once with --record against real hosts and then replayed, so runs are repeatable and offline. The model is pluggable: --platform local (the default) uses a deterministic stand-in model, so the agent loop itself can be checked without an API key. Any other platform runs the real model against the same fixtures.
+
+    python -m netdata_llm_agent.evaluation --record            # record fixtures from live hosts
+    python -m netdata_llm_agent.evaluation --update-baseline   # store the current results as the baseline
+    python -m netdata_llm_agent.evaluation                     # compare against the baseline
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+import requests
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from netdata_llm_agent import client
+from netdata_llm_agent.agent import NetdataLLMAgent, usage_summary
+from netdata_llm_agent.cache import STOP_WORDS, normalize_question
+from netdata_llm_agent.inventory import estimate_tokens
+
+load_dotenv()
+
+DEFAULT_CHATS_DIR = "example_chats"
+DEFAULT_FIXTURES = "example_chats/eval_fixtures.json"
+DEFAULT_BASELINE = "example_chats/eval_baseline.json"
+
+# metric: (relative, absolute) increase over the baseline allowed before it counts as a regression
+DEFAULT_TOLERANCES = {
+    "steps": (0.0, 1),
+    "tool_calls": (0.0, 1),
+    "input_tokens": (0.2, 200),
+    "output_tokens": (0.5, 100),
+    "wall_time": (0.5, 1.0),
+}
+
+QUESTION_RE = re.compile(r"^You: (.*)$")
+
+
+def load_transcripts(chats_dir: str = DEFAULT_CHATS_DIR) -> list:
+    """
+    Extract the user questions from the chats saved by the CLI, skipping slash commands.
+
+    Args:
+        chats_dir: Directory with the saved chat markdown files.
+
+    Returns:
+        List of dicts with name, label ('good', 'bad' or '') and questions, sorted by name.
+    """
+    transcripts = []
+    for path in sorted(glob.glob(os.path.join(chats_dir, "*.md"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            questions = [
+                match.group(1).strip()
+                for match in map(QUESTION_RE.match, f.read().split("\n"))
+                if match and not match.group(1).startswith("/")
+            ]
+        if questions:
+            label = name.split("_", 1)[0] if name.startswith(("good_", "bad_")) else ""
+            transcripts.append({"name": name, "label": label, "questions": questions})
+
+    return transcripts
+
+
+class Fixtures:
+    """
+    Fixtures records the responses to the HTTP requests the tools make, keyed by url and params, and replays them.
+
+    Args:
+        path: JSON file to load the fixtures from and save them to.
+        record: If True, make real requests and record their responses. Default is False (replay only).
+    """
+
+    def __init__(self, path: str, record: bool = False):
+        self.path = path
+        self.record = record
+        self.responses = {}
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.responses = json.load(f)
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        """Fixture key for a request."""
+        if not params:
+            return url
+        return f"{url} {json.dumps(params, sort_keys=True)}"
+
+    def save(self):
+        """Save the fixtures to path."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, indent=2, sort_keys=True)
+
+    def _response(self, url: str, status_code: int, body: str) -> requests.Response:
+        response = requests.Response()
+        response.url = url
+        response.status_code = status_code
+        response.encoding = "utf-8"
+        response._content = body.encode("utf-8")
+        return response
+
+    @contextmanager
+    def active(self):
+        """Route the shared HTTP client through the fixtures for the duration of the block."""
+        session_get = client._session.get
+
+        def get(url, params=None, **kwargs):
+            key = self.key(url, params)
+            if self.record:
+                response = session_get(url, params=params, **kwargs)
+                self.responses[key] = {"status_code": response.status_code, "body": response.text}
+                return response
+            fixture = self.responses.get(key)
+            if fixture is None:
+                # a 404 rather than an exception so the missing fixture shows in the answer, not as a tripped circuit breaker
+                self.misses += 1
+                return self._response(url, 404, f"No fixture recorded for {key}")
+            return self._response(url, fixture["status_code"], fixture["body"])
+
+        client._session.get = get
+        try:
+            yield self
+        finally:
+            client._session.get = session_get
+
+
+def _content_text(content) -> str:
+    """Message content as plain text."""
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def _keyword(question: str) -> str:
+    """Longest non stop word of a question, used as a search term."""
+    words = [w for w in normalize_question(question).split() if w not in STOP_WORDS and w.isalpha()]
+    return max(words, key=len) if words else ""
+
+
+class LocalChatModel(BaseChatModel):
+    """
+    LocalChatModel is a deterministic stand-in chat model for evaluating the agent loop without an API.
+
+    It picks a tool from keywords in the question, follows a chart search with a call for the current metrics, and then answers with a summary of the tool results. Token usage is estimated from the message sizes, so growth in prompts or tool outputs still shows in the results.
+
+    Args:
+        netdata_host_url: Netdata host url to pass to the tools.
+        max_tool_steps: Maximum number of tool calling steps before answering. Default is 2.
+    """
+
+    netdata_host_url: str = "http://localhost:19999"
+    max_tool_steps: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "netdata-local"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _first_tool_call(self, question: str) -> dict:
+        keyword = _keyword(question)
+        lowered = question.lower()
+        if "alarm" in lowered or "alert" in lowered:
+            return {"name": "get_alarms", "args": {"netdata_host_url": self.netdata_host_url, "active": True}}
+        if "anomal" in lowered:
+            return {"name": "get_anomaly_rates", "args": {"netdata_host_url": self.netdata_host_url}}
+        if "docs" in lowered or "netdata" in lowered:
+            return {"name": "get_netdata_docs_sitemap", "args": {"search_term": keyword}}
+        return {
+            "name": "get_charts",
+            "args": {"netdata_host_url": self.netdata_host_url, "search_term": keyword},
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        input_tokens = sum(estimate_tokens(_content_text(m.content)) for m in messages)
+        question = next((m for m in reversed(messages) if m.type == "human"), None)
+        question = _content_text(question.content) if question is not None else ""
+        # tool results since the question
+        turn = []
+        for m in reversed(messages):
+            if m.type == "human":
+                break
+            turn.insert(0, m)
+        tool_results = [m for m in turn if m.type == "tool"]
+
+        tool_call = None
+        if not tool_results:
+            tool_call = self._first_tool_call(question)
+        elif (
+            len(tool_results) < self.max_tool_steps
+            and tool_results[-1].name == "get_charts"
+            and _content_text(tool_results[-1].content).strip() not in ("", "{}", "[]")
+        ):
+            tool_call = {
+                "name": "get_current_metrics",
+                "args": {"netdata_host_url": self.netdata_host_url, "search_term": _keyword(question)},
+            }
+
+        if tool_call is not None:
+            tool_call["id"] = f"call_{len(messages)}"
+            message = AIMessage(content="", tool_calls=[tool_call])
+            output = json.dumps(tool_call)
+        else:
+            used = ", ".join(m.name for m in tool_results) or "no tools"
+            size = sum(len(_content_text(m.content)) for m in tool_results)
+            message = AIMessage(content=f"Answer based on {used} ({size} characters of tool output).")
+            output = message.content
+        output_tokens = estimate_tokens(output)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def run_transcript(transcript: dict, make_agent) -> list:
+    """
+    Replay the questions of a transcript as one conversation.
+
+    Args:
+        transcript: Transcript from load_transcripts().
+        make_agent: Callable returning a new NetdataLLMAgent.
+
+    Returns:
+        List of per question results with id, label, question, steps, tool_calls, tools, tokens, wall_time, answer and error.
+    """
+    agent = make_agent()
+    results = []
+    for i, question in enumerate(transcript["questions"]):
+        result = {
+            "id": f"{transcript['name']}#{i}",
+            "label": transcript["label"],
+            "question": question,
+            "error": None,
+        }
+        start = time.perf_counter()
+        new_messages = []
+        try:
+            new_messages = agent.chat(question, continue_chat=i > 0, return_thinking=True)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["wall_time"] = time.perf_counter() - start
+        usage = usage_summary(new_messages)
+        tools = [c["name"] for m in new_messages if m.type == "ai" for c in m.tool_calls]
+        result.update(
+            {
+                "steps": sum(1 for m in new_messages if m.type == "ai"),
+                "tool_calls": len(tools),
+                "tools": tools,
+                "input_tokens": usage["input_tokens"],
+                "output_tokens": usage["output_tokens"],
+                "answer": _content_text(new_messages[-1].content) if new_messages else None,
+            }
+        )
+        results.append(result)
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerances: dict = None, answers: bool = True) -> list:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Results from run_transcript().
+        baseline: Baseline results.
+        tolerances: Dict of metric to (relative, absolute) allowed increase. Default is DEFAULT_TOLERANCES.
+        answers: If True, a changed answer to a question of a 'good' transcript counts as a regression. Default is True.
+
+    Returns:
+        List of regression descriptions, empty if none. A result with no baseline entry counts as a regression, so new questions can't pass unchecked.
+    """
+    tolerances = tolerances or DEFAULT_TOLERANCES
+    baseline = {r["id"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["id"])
+        if base is None:
+            regressions.append(f"{result['id']}: no baseline entry, run with --update-baseline to add it")
+            continue
+        if result["error"] and not base["error"]:
+            regressions.append(f"{result['id']}: new error {result['error']}")
+        if "tools" in base and result["tools"] != base["tools"]:
+            regressions.append(
+                f"{result['id']}: tools [{', '.join(result['tools'])}] != baseline [{', '.join(base['tools'])}]"
+            )
+        if answers and result.get("label") == "good" and "answer" in base and result["answer"] != base["answer"]:
+            regressions.append(f"{result['id']}: answer changed from the good baseline answer {base['answer']!r}")
+        for metric, (relative, absolute) in tolerances.items():
+            limit = base[metric] * (1 + relative) + absolute
+            if result[metric] > limit:
+                regressions.append(
+                    f"{result['id']}: {metric} {result[metric]:g} > {limit:g} (baseline {base[metric]:g})"
+                )
+
+    return regressions
+
+
+def totals(results: list) -> dict:
+    """Sum the metrics over all results."""
+    summary = {
+        metric: sum(r[metric] for r in results)
+        for metric in ["steps", "tool_calls", "input_tokens", "output_tokens", "wall_time"]
+    }
+    summary["questions"] = len(results)
+    summary["errors"] = sum(1 for r in results if r["error"])
+
+    return summary
+
+
+def print_results(results: list, baseline: list):
+    """Print a table of results with the change versus the baseline."""
+    baseline = {r["id"]: r for r in baseline}
+    print(f"{'question':48} {'steps':>7} {'tools':>7} {'in tok':>9} {'out tok':>8} {'wall s':>8}")
+    for r in results:
+        base = baseline.get(r["id"])
+
+        def cell(metric, fmt):
+            value = format(r[metric], fmt)
+            if base is not None and r[metric] != base[metric]:
+                value += "*"
+            return value
+
+        label = f"{r['id'][-28:]} {r['question'][:19]}"
+        print(
+            f"{label:48} {cell('steps', 'd'):>7} {cell('tool_calls', 'd'):>7} "
+            f"{cell('input_tokens', 'd'):>9} {cell('output_tokens', 'd'):>8} {r['wall_time']:8.2f}"
+            + (f"  ERROR {r['error']}" if r["error"] else "")
+        )
+    print(f"totals: {json.dumps(totals(results))}")
+    if baseline:
+        print(f"baseline totals: {json.dumps(totals(list(baseline.values())))}")
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    default_hosts_str = os.environ.get("NETDATA_URL_LIST", "http://localhost:19999")
+    default_hosts = [
+        host.strip() for host in default_hosts_str.split(",") if host.strip()
+    ]
+
+    parser = argparse.ArgumentParser(
+        description="Replay example chats against recorded fixtures and compare with a baseline."
+    )
+    parser.add_argument(
+        "--host",
+        nargs="+",
+        default=default_hosts,
+        help="Netdata host URL(s) as a space-separated list. "
+        "Defaults to the list from NETDATA_URL_LIST in the .env file or 'http://localhost:19999'.",
+    )
+    parser.add_argument(
+        "--platform",
+        type=str,
+        default="local",
+        help="LLM platform to use, 'local' for the deterministic stand-in model. Default is 'local'.",
+    )
+    parser.add_argument(
+        "--model", type=str, default="gpt-4o-mini", help="LLM model to use. Default is 'gpt-4o-mini'."
+    )
+    parser.add_argument("--chats", type=str, default=DEFAULT_CHATS_DIR, help="Directory of saved chats.")
+    parser.add_argument("--fixtures", type=str, default=DEFAULT_FIXTURES, help="Fixtures file.")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline results file.")
+    parser.add_argument(
+        "--record", action="store_true", help="Make real requests and record them to the fixtures file."
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Save the results as the new baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        nargs="+",
+        default=[],
+        help="Override tolerances as metric=relative,absolute (e.g. wall_time=1.0,2).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Entry point for running the evaluation."""
+    args = parse_args()
+
+    tolerances = dict(DEFAULT_TOLERANCES)
+    for override in args.tolerance:
+        metric, values = override.split("=")
+        relative, absolute = values.split(",")
+        tolerances[metric] = (float(relative), float(absolute))
+
+    def make_agent():
+        llm = LocalChatModel(netdata_host_url=args.host[0]) if args.platform == "local" else None
+        platform = "openai" if args.platform == "local" else args.platform
+        return NetdataLLMAgent(args.host, model=args.model, platform=platform, llm=llm)
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create it.")
+        return 1
+
+    fixtures = Fixtures(args.fixtures, record=args.record)
+    results = []
+    with fixtures.active():
+        for transcript in load_transcripts(args.chats):
+            results.extend(run_transcript(transcript, make_agent))
+    if not results:
+        print(f"No questions found in {args.chats}.")
+        return 1
+    if args.record:
+        fixtures.save()
+        print(f"Recorded {len(fixtures.responses)} fixtures to {args.fixtures}")
+
+    baseline = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if fixtures.misses:
+        # the answers were built from 404s, so neither the comparison nor a new baseline would mean anything
+        print(f"FAILED {fixtures.misses} requests had no recorded fixture, run with --record to record them.")
+        return 1
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    # a real model words its answers differently on every run, so only the local model's answers are compared
+    regressions = compare(results, baseline, tolerances, answers=args.platform == "local")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
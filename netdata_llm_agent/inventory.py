@@ -0,0 +1,154 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compact per-host inventory for embedding in the agent system prompt, so the model does not need to spend its first steps on get_info/get_charts discovery calls.
+"""
+
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from netdata_llm_agent.tools import get_info, get_charts
+
+
+# rough chars per token, good enough for budgeting prompt text without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in some text.
+
+    Args:
+        text: Text to estimate.
+
+    Returns:
+        Approximate token count.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _format_bytes(value) -> str:
+    """Format a byte count as GiB, passing through anything that is not a number."""
+    try:
+        return f"{int(value) / 1024 ** 3:.1f}GiB"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def build_host_inventory(netdata_host_url: str) -> dict:
+    """
+    Build a compact inventory for a single Netdata host.
+
+    Args:
+        netdata_host_url: Netdata host url.
+
+    Returns:
+        Dict with hostname, os, cores, ram, chart families (with chart counts), collectors and alarm counts.
+    """
+    try:
+        info = json.loads(get_info(netdata_host_url))
+        charts = json.loads(get_charts(netdata_host_url))
+    except Exception as e:
+        return {"url": netdata_host_url, "error": f"unreachable ({type(e).__name__})"}
+
+    families = Counter(chart[0].split(".")[0] for chart in charts)
+    collectors = sorted(
+        {c.get("module") or c.get("plugin") for c in info.get("collectors", [])} - {None, ""}
+    )
+
+    return {
+        "url": netdata_host_url,
+        "hostname": info.get("hostname"),
+        "os": f"{info.get('operating_system')} {info.get('operating_system_version')}".strip(),
+        "cores": info.get("cores_total"),
+        "ram": _format_bytes(info.get("ram_total")),
+        "charts": info.get("charts-count"),
+        "families": [f for f, _ in families.most_common()],
+        "family_counts": dict(families),
+        "collectors": collectors,
+        "alarms": info.get("alarms", {}),
+        "mirrored_hosts": [
+            h["hostname"] for h in info.get("mirrored_hosts", []) if h.get("hops", 0) > 0
+        ],
+    }
+
+
+def _format_host(host: dict, max_families: int, max_collectors: int, max_mirrored: int) -> str:
+    """Render a host inventory as a few compact lines, keeping only the top items of each list."""
+    if "error" in host:
+        return f"- {host['url']}: {host['error']}"
+
+    alarms = host["alarms"]
+    lines = [
+        f"- {host['url']}: hostname={host['hostname']}, os={host['os']}, cores={host['cores']}, "
+        f"ram={host['ram']}, charts={host['charts']}, "
+        f"alarms(warning={alarms.get('warning', 0)}, critical={alarms.get('critical', 0)})"
+    ]
+    families = host["families"][:max_families]
+    if families:
+        more = len(host["families"]) - len(families)
+        lines.append(
+            "  families: "
+            + ", ".join(f"{f}({host['family_counts'][f]})" for f in families)
+            + (f", +{more} more" if more > 0 else "")
+        )
+    collectors = host["collectors"][:max_collectors]
+    if collectors:
+        more = len(host["collectors"]) - len(collectors)
+        lines.append(
+            "  collectors: " + ", ".join(collectors) + (f", +{more} more" if more > 0 else "")
+        )
+    mirrored = host["mirrored_hosts"][:max_mirrored]
+    if mirrored:
+        more = len(host["mirrored_hosts"]) - len(mirrored)
+        lines.append(
+            "  mirrored_hosts: " + ", ".join(mirrored) + (f", +{more} more" if more > 0 else "")
+        )
+
+    return "\n".join(lines)
+
+
+def format_inventory(inventories: list, max_tokens: int = 1500) -> str:
+    """
+    Render host inventories as compact prompt text within a token budget.
+
+    The list sections (families, collectors, mirrored hosts) are shrunk step by step until the text fits, so the most populated chart families survive longest.
+
+    Args:
+        inventories: List of host inventory dicts from build_host_inventory().
+        max_tokens: Approximate token budget for the rendered text.
+
+    Returns:
+        Inventory text for the system prompt.
+    """
+    header = "Host inventory (precomputed, use it instead of discovery calls where possible):\n"
+    limits = [40, 30, 20]
+    while True:
+        text = header + "\n".join(_format_host(h, *limits) for h in inventories)
+        if estimate_tokens(text) <= max_tokens or not any(limits):
+            break
+        limits = [limit // 2 for limit in limits]
+
+    if estimate_tokens(text) > max_tokens:
+        text = text[: max_tokens * CHARS_PER_TOKEN].rsplit("\n", 1)[0]
+
+    return text
+
+
+def build_inventory(netdata_host_urls: list, max_tokens: int = 1500) -> str:
+    """
+    Build the inventory text for a list of Netdata hosts, fetching hosts in parallel.
+
+    Args:
+        netdata_host_urls: List of Netdata host urls.
+        max_tokens: Approximate token budget for the rendered text.
+
+    Returns:
+        Inventory text for the system prompt.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(netdata_host_urls)))) as pool:
+        inventories = list(pool.map(build_host_inventory, netdata_host_urls))
+
+    return format_inventory(inventories, max_tokens=max_tokens)
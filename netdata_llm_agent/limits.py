@@ -0,0 +1,158 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Limits on how much a single agent turn can consume: tool output size caps that truncate with a hint on how to narrow the query, and a cap on the conversation history kept in the graph state.
+"""
+
+import functools
+import json
+
+from netdata_llm_agent.inventory import CHARS_PER_TOKEN, estimate_tokens
+
+
+# how to get a smaller result from each tool, shown when its output is truncated
+NARROWING_HINTS = {
+    "get_charts": "use a more specific search_term, or include_dimensions=False",
+    "get_chart_info": "request a single chart",
+    "get_chart_data": "use a shorter after/before range or fewer points",
+    "get_alarms": "use active=True, or compact=True with a lower max_rows",
+    "get_current_metrics": "use a more specific search_term",
+    "get_anomaly_rates": "use a search_term or a shorter after/before range",
+    "get_netdata_docs_sitemap": "use a more specific search_term",
+    "get_netdata_docs_page": "use the sections param to get specific sections",
+}
+
+
+def _size(value) -> int:
+    return len(json.dumps(value))
+
+
+def _replace(value, path: list, new):
+    """Copy of value with the item at path (a list of keys) replaced by new."""
+    if not path:
+        return new
+    copy = dict(value)
+    copy[path[0]] = _replace(value[path[0]], path[1:], new)
+    return copy
+
+
+def _truncate_json(value, max_chars: int):
+    """
+    Keep as many leading items of a JSON list or object as fit in max_chars when serialized.
+
+    If most of an object's size is in one of its values (e.g. the rows of a compact alarms table), that value is truncated instead and the other keys are kept, going down as many levels as needed.
+
+    Returns:
+        Tuple of (text, kept, total, path) or None if the value can not be truncated by item. path is the list of keys of the truncated value, empty for the top level.
+    """
+    # go down into a value that holds most of the size
+    path, node = [], value
+    while isinstance(node, dict) and node:
+        key = max(node, key=lambda k: _size(node[k]))
+        child = node[key]
+        if not isinstance(child, (dict, list)) or len(child) < 2 or _size(child) * 2 < _size(node):
+            break
+        path.append(key)
+        node = child
+    if not isinstance(node, (dict, list)) or len(node) < 2:
+        return None
+    items = list(node.items()) if isinstance(node, dict) else node
+
+    def dump(n):
+        kept = dict(items[:n]) if isinstance(node, dict) else items[:n]
+        return json.dumps(_replace(value, path, kept), indent=2)
+
+    # binary search the number of items that fit
+    low, high = 0, len(items)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if len(dump(mid)) <= max_chars:
+            low = mid
+        else:
+            high = mid - 1
+    if low == 0:
+        return None
+
+    return dump(low), low, len(items), path
+
+
+def truncate_output(text: str, max_tokens: int, tool_name: str = None) -> str:
+    """
+    Truncate a tool output to roughly max_tokens, appending a hint on how to narrow the query.
+
+    JSON lists and objects keep their leading items and stay valid JSON (an object mostly made of one list or object keeps its other keys and has that value truncated), other text is cut at a line boundary.
+
+    Args:
+        text: Tool output.
+        max_tokens: Approximate token budget.
+        tool_name: Name of the tool, used to pick the narrowing hint.
+
+    Returns:
+        The output, unchanged if within budget.
+    """
+    if not isinstance(text, str) or estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    try:
+        truncated = _truncate_json(json.loads(text), max_chars)
+    except ValueError:
+        truncated = None
+    if truncated is not None:
+        kept_text, kept, total, path = truncated
+        note = f"showing {kept} of {total} entries" + (f" of {'.'.join(map(str, path))}" if path else "")
+    else:
+        cut = text.rfind("\n", 0, max_chars)
+        cut = cut if cut > max_chars // 2 else max_chars
+        kept_text = text[:cut]
+        note = f"showing {cut} of {len(text)} characters"
+
+    hint = NARROWING_HINTS.get(tool_name, "narrow the query")
+    return (
+        f"{kept_text}\n\n[output truncated to about {max_tokens} tokens, {note}. "
+        f"Narrow your query to see the rest: {hint}.]"
+    )
+
+
+def cap_tool_output(func, max_tokens: int):
+    """
+    Wrap a tool function so its output is truncated to max_tokens, keeping its name, signature and docstring for the tool schema.
+
+    Args:
+        func: Tool function.
+        max_tokens: Approximate token budget for the output, None for no cap.
+
+    Returns:
+        Wrapped function.
+    """
+    if not max_tokens:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return truncate_output(func(*args, **kwargs), max_tokens, func.__name__)
+
+    return wrapper
+
+
+def trim_history(messages: list, max_messages: int) -> list:
+    """
+    Keep roughly the last max_messages messages of a conversation, starting on a user message so no tool result loses its tool call.
+
+    The latest user message is always kept, so a turn with more steps than max_messages is kept whole.
+
+    Args:
+        messages: Conversation messages, oldest first.
+        max_messages: Approximate number of messages to keep, None for no limit.
+
+    Returns:
+        The trailing messages kept.
+    """
+    if not max_messages or len(messages) <= max_messages:
+        return messages
+    cut = len(messages) - max_messages
+    human = [i for i, m in enumerate(messages) if m.type == "human"]
+    start = next((i for i in human if i >= cut), human[-1] if human else 0)
+
+    return messages[start:]
@@ -0,0 +1,196 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tiered model routing for the agent graph: a fast (small or local) model makes the intermediate tool calling decisions and the strong model writes the final answer.
+"""
+
+import json
+import time
+
+from langchain_core.messages import message_chunk_to_message
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode, tools_condition
+
+from netdata_llm_agent.inventory import estimate_tokens
+
+
+# weight of the latest strong model call in the running latency estimate
+STRONG_LATENCY_SMOOTHING = 0.3
+# characters of text the fast model may write before any tool call, before its call is cut short as a final answer
+FAST_MAX_TEXT_CHARS = 100
+
+
+def _text(content) -> str:
+    """Text of message content, which is a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(b.get("text", "") if isinstance(b, dict) else str(b) for b in content)
+
+
+def _stream_fast(fast, messages: list):
+    """
+    Stream a fast model call, stopping it as soon as it is writing a final answer rather than calling tools.
+
+    Args:
+        fast: Fast chat model with tools bound.
+        messages: Messages to send.
+
+    Returns:
+        Tuple of (response, stopped). A stopped response only holds the start of the answer, and its usage_metadata is estimated if the model had not reported it yet.
+    """
+    response, stopped = None, False
+    for chunk in fast.stream(messages):
+        response = chunk if response is None else response + chunk
+        if not (getattr(response, "tool_call_chunks", None) or getattr(response, "tool_calls", None)):
+            if len(_text(response.content)) > FAST_MAX_TEXT_CHARS:
+                stopped = True
+                break
+    response = message_chunk_to_message(response)
+    if stopped and not response.usage_metadata:
+        input_tokens = sum(estimate_tokens(_text(m.content)) for m in messages)
+        output_tokens = estimate_tokens(_text(response.content))
+        response.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+    return response, stopped
+
+
+def _escalation_reason(response, messages: list, tool_names: set):
+    """
+    Check if a fast model response can be accepted as an intermediate tool calling step.
+
+    Args:
+        response: Fast model response.
+        messages: Conversation so far.
+        tool_names: Names of the available tools.
+
+    Returns:
+        None to accept the response, otherwise the reason to escalate to the strong model.
+    """
+    if not response.tool_calls:
+        return "final_answer"
+    if getattr(response, "invalid_tool_calls", None):
+        return "invalid_tool_call"
+    if any(c["name"] not in tool_names for c in response.tool_calls):
+        return "unknown_tool"
+
+    # calling exactly the same tools as the previous step usually means the fast model is stuck
+    previous = next((m for m in reversed(messages) if m.type == "ai"), None)
+    if previous is not None and previous.tool_calls:
+
+        def signature(tool_calls):
+            return sorted(json.dumps([c["name"], c["args"]], sort_keys=True) for c in tool_calls)
+
+        if signature(previous.tool_calls) == signature(response.tool_calls):
+            return "repeated_tool_call"
+
+    return None
+
+
+def create_routed_agent(
+    fast_llm, strong_llm, tools: list, fast_prompt, strong_prompt, checkpointer=None
+):
+    """
+    Create a ReAct agent graph that routes each model step to the fast or strong model.
+
+    Every step is first tried with the fast model. Tool calls from it are accepted as is, while a final answer or a low confidence response (invalid or unknown tool calls, repeating the previous step) is discarded and the step is re-run with the strong model. The fast model is streamed and stopped once it writes more than FAST_MAX_TEXT_CHARS of text without calling a tool, so a final answer it would throw away costs only a few tokens. The model used, its latency and the estimated latency saved are recorded in each AI message's response_metadata["routing"], along with the token usage of a discarded fast model call as "discarded_usage" so it is still counted by usage_summary().
+
+    Args:
+        fast_llm: Fast chat model for intermediate tool calling steps.
+        strong_llm: Strong chat model for the final answer and escalations.
+        tools: List of tools.
+        fast_prompt: System message for the fast model.
+        strong_prompt: System message for the strong model.
+        checkpointer: Optional LangGraph checkpointer.
+
+    Returns:
+        Compiled graph.
+    """
+    fast = fast_llm.bind_tools(tools)
+    strong = strong_llm.bind_tools(tools)
+    tool_names = {t.name for t in tools}
+    strong_latency = {"estimate": None}
+
+    def call_model(state: MessagesState):
+        messages = state["messages"]
+
+        start = time.perf_counter()
+        fast_response, stopped = _stream_fast(fast, [fast_prompt, *messages])
+        fast_latency = time.perf_counter() - start
+        reason = (
+            "final_answer" if stopped else _escalation_reason(fast_response, messages, tool_names)
+        )
+        if reason is None:
+            response = fast_response
+            estimate = strong_latency["estimate"]
+            response.response_metadata["routing"] = {
+                "model": "fast",
+                "latency": fast_latency,
+                "latency_saved": estimate - fast_latency if estimate is not None else 0.0,
+            }
+            return {"messages": [response]}
+
+        start = time.perf_counter()
+        response = strong.invoke([strong_prompt, *messages])
+        latency = time.perf_counter() - start
+        estimate = strong_latency["estimate"]
+        strong_latency["estimate"] = (
+            latency
+            if estimate is None
+            else STRONG_LATENCY_SMOOTHING * latency + (1 - STRONG_LATENCY_SMOOTHING) * estimate
+        )
+        response.response_metadata["routing"] = {
+            "model": "strong",
+            "latency": latency,
+            "escalation": reason,
+            # the discarded fast model call is pure overhead
+            "latency_saved": -fast_latency,
+        }
+        if fast_response.usage_metadata:
+            response.response_metadata["routing"]["discarded_usage"] = dict(
+                fast_response.usage_metadata
+            )
+        return {"messages": [response]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("agent", call_model)
+    graph.add_node("tools", ToolNode(tools))
+    graph.add_edge(START, "agent")
+    graph.add_conditional_edges("agent", tools_condition)
+    graph.add_edge("tools", "agent")
+
+    return graph.compile(checkpointer=checkpointer)
+
+
+def routing_summary(messages: list) -> dict:
+    """
+    Summarize how the model steps in a list of messages (e.g. the new messages of a turn) were routed.
+
+    Args:
+        messages: List of messages.
+
+    Returns:
+        Dict with fast_steps, strong_steps, escalations (by reason), model_latency (seconds spent in model calls) and latency_saved (estimated seconds saved versus running every step on the strong model).
+    """
+    summary = {
+        "fast_steps": 0,
+        "strong_steps": 0,
+        "escalations": {},
+        "model_latency": 0.0,
+        "latency_saved": 0.0,
+    }
+    for m in messages:
+        routing = getattr(m, "response_metadata", {}).get("routing")
+        if not routing:
+            continue
+        summary[f"{routing['model']}_steps"] += 1
+        summary["model_latency"] += routing["latency"]
+        summary["latency_saved"] += routing["latency_saved"]
+        if "escalation" in routing:
+            reason = routing["escalation"]
+            summary["escalations"][reason] = summary["escalations"].get(reason, 0) + 1
+
+    return summary
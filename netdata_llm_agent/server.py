@@ -0,0 +1,416 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Headless multi-user HTTP API server for the Netdata LLM Agent.
+
+One process serves many sessions: a single NetdataLLMAgent (compiled graph, answer cache, conversation store and HTTP pools) is shared, and each session is a conversation thread in the store.
+
+Endpoints:
+- GET /health : Server status and current load.
+- POST /chat : {"message", "session_id"?} -> {"session_id", "answer", "cached", "usage", "routing"}.
+- POST /chat/stream : Same body as /chat, streams the agent steps as server-sent events.
+- GET /sessions : List recent sessions.
+- GET /tools : List the tools available to call directly.
+- POST /tools/{name} : Call a tool directly with a JSON object of arguments.
+
+Every request the tools make, whether called directly or by the agent, is restricted to the configured Netdata hosts and the docs site (see client.set_allowed_urls()), so users can't get the server to fetch other urls.
+
+Only one message runs per session at a time, a second one gets a 409. Sessions not used for max_session_age, or beyond the max_sessions most recently used, are deleted after each turn.
+"""
+
+import argparse
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from netdata_llm_agent import client
+from netdata_llm_agent.agent import NetdataLLMAgent, TOOL_FUNCTIONS, usage_summary
+from netdata_llm_agent.routing import routing_summary
+from netdata_llm_agent.cache import AnswerCache
+
+load_dotenv()
+
+DOCS_URL_PREFIX = "https://learn.netdata.cloud/"
+
+
+class QueueFullError(Exception):
+    """Raised when a request cannot get a slot because the queue is full or it waited too long."""
+
+
+class SessionBusyError(Exception):
+    """Raised when a session already has a turn running."""
+
+
+class SessionLocks:
+    """
+    SessionLocks makes sure only one turn runs per session at a time, as concurrent turns on the same conversation thread would interleave their checkpoints.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = set()
+
+    @contextmanager
+    def hold(self, session_id: str):
+        """Hold the session for the duration of the block, raising SessionBusyError if it is already held."""
+        with self.lock:
+            if session_id in self.active:
+                raise SessionBusyError(f"Session {session_id} already has a message in progress.")
+            self.active.add(session_id)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active.discard(session_id)
+
+    def busy(self, session_id: str) -> bool:
+        """Check if a session has a turn running."""
+        with self.lock:
+            return session_id in self.active
+
+    def snapshot(self) -> set:
+        """Sessions with a turn running."""
+        with self.lock:
+            return set(self.active)
+
+
+class ConcurrencyLimiter:
+    """
+    ConcurrencyLimiter allows at most `limit` concurrent slots, queues up to `max_queued` waiters and rejects the rest.
+
+    Args:
+        limit: Maximum number of concurrent slots.
+        max_queued: Maximum number of requests waiting for a slot.
+        queue_timeout: Seconds a request may wait for a slot before being rejected.
+    """
+
+    def __init__(self, limit: int, max_queued: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of the block, raising QueueFullError if none can be had."""
+        with self.lock:
+            if self.queued >= self.max_queued:
+                raise QueueFullError("Too many queued requests, try again later.")
+            self.queued += 1
+        acquired = self.semaphore.acquire(timeout=self.queue_timeout)
+        with self.lock:
+            self.queued -= 1
+            if acquired:
+                self.active += 1
+        if not acquired:
+            raise QueueFullError("Timed out waiting for a free slot, try again later.")
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+            self.semaphore.release()
+
+    def stats(self) -> dict:
+        """Current load."""
+        return {"limit": self.limit, "active": self.active, "queued": self.queued}
+
+
+def _message_to_dict(message) -> dict:
+    """Serialize a LangChain message for the API."""
+    data = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        data["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in message.tool_calls]
+    if message.type == "tool":
+        data["name"] = message.name
+    if message.response_metadata.get("cached"):
+        data["cached"] = True
+    return data
+
+
+def create_app(
+    netdata_host_urls: list,
+    model: str = "gpt-4o-mini",
+    platform: str = "openai",
+    router_model: str = None,
+    router_platform: str = None,
+    checkpoint_db: str = ":memory:",
+    llm_concurrency: int = 4,
+    max_queued: int = 32,
+    queue_timeout: float = 120,
+    max_steps: int = 12,
+    max_turn_seconds: float = 120,
+    max_session_age: float = 86400,
+    max_sessions: int = 1000,
+) -> Starlette:
+    """
+    Create the API server app.
+
+    Restricts the requests of all tools in the process to netdata_host_urls and the docs site.
+
+    Args:
+        netdata_host_urls: List of Netdata host urls the agent (and direct tool calls) may use.
+        model: Language model to use. Default is 'gpt-4o-mini'.
+        platform: Platform to use. Default is 'openai'.
+        router_model: Optional fast model for intermediate tool calling steps. Default is None.
+        router_platform: Platform of the router model. Default is None (same as platform).
+        checkpoint_db: SQLite database to persist sessions in. Default is ':memory:'.
+        llm_concurrency: Maximum number of agent runs in flight at once. Default is 4. A run holds its slot for the whole turn, tool calls included, and the fast and strong router models share it, so this bounds concurrent LLM calls without being a per-model limit.
+        max_queued: Maximum number of chat requests waiting for a free slot. Default is 32.
+        queue_timeout: Seconds a chat request may wait for a free slot. Default is 120.
+        max_steps: Maximum number of model steps per chat turn. Default is 12.
+        max_turn_seconds: Wall-clock deadline per chat turn in seconds. Default is 120.
+        max_session_age: Delete sessions not used for this many seconds. Default is 86400, None to keep them.
+        max_sessions: Keep at most this many of the most recently used sessions. Default is 1000, None for no limit.
+
+    Returns:
+        Starlette app.
+    """
+    agent = NetdataLLMAgent(
+        netdata_host_urls,
+        model=model,
+        platform=platform,
+        router_model=router_model,
+        router_platform=router_platform,
+        checkpoint_db=checkpoint_db,
+        answer_cache=AnswerCache(),
+        max_steps=max_steps,
+        max_turn_seconds=max_turn_seconds,
+    )
+    # enforced in the HTTP client, below the model, so a chat can't reach other urls either
+    client.set_allowed_urls([*netdata_host_urls, DOCS_URL_PREFIX])
+    limiter = ConcurrencyLimiter(llm_concurrency, max_queued, queue_timeout)
+    sessions_in_use = SessionLocks()
+    tools = {f.__name__: f for f in TOOL_FUNCTIONS}
+    allowed_hosts = {url.rstrip("/") for url in netdata_host_urls}
+
+    async def _chat_request(request: Request):
+        """Parse a chat request body into (message, session_id)."""
+        body = await request.json()
+        message = body.get("message")
+        if not message:
+            raise ValueError("'message' is required.")
+        return message, body.get("session_id") or str(uuid.uuid4())
+
+    def _prune_sessions():
+        """Delete old sessions after a turn, never ones with a turn running."""
+        agent.conversation_store.prune(
+            max_age_seconds=max_session_age,
+            max_threads=max_sessions,
+            keep=sessions_in_use.snapshot(),
+        )
+
+    def _chat(message: str, session_id: str) -> dict:
+        with sessions_in_use.hold(session_id), limiter.slot():
+            new_messages = agent.chat(
+                message, thread_id=session_id, return_thinking=True, continue_chat=True
+            )
+        _prune_sessions()
+        answer = new_messages[-1]
+        return {
+            "session_id": session_id,
+            "answer": answer.content,
+            "cached": bool(answer.response_metadata.get("cached")),
+            "usage": usage_summary(new_messages),
+            "routing": routing_summary(new_messages),
+        }
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok", "model": model, "llm": limiter.stats()})
+
+    async def chat(request: Request):
+        try:
+            message, session_id = await _chat_request(request)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        try:
+            return JSONResponse(await run_in_threadpool(_chat, message, session_id))
+        except SessionBusyError as e:
+            return JSONResponse({"error": str(e)}, status_code=409)
+        except QueueFullError as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+
+    async def chat_stream(request: Request):
+        try:
+            message, session_id = await _chat_request(request)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if sessions_in_use.busy(session_id):
+            return JSONResponse(
+                {"error": f"Session {session_id} already has a message in progress."}, status_code=409
+            )
+
+        def events():
+            yield f"event: session\ndata: {json.dumps({'session_id': session_id})}\n\n"
+            new_messages = []
+            try:
+                # held from when the stream starts, a racing request gets an error event instead of a 409
+                with sessions_in_use.hold(session_id), limiter.slot():
+                    for m in agent.stream_chat(message, continue_chat=True, thread_id=session_id):
+                        new_messages.append(m)
+                        yield f"event: message\ndata: {json.dumps(_message_to_dict(m))}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            _prune_sessions()
+            yield f"event: done\ndata: {json.dumps({'usage': usage_summary(new_messages)})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def sessions(request: Request):
+        limit = int(request.query_params.get("limit", 50))
+        return JSONResponse({"sessions": agent.list_threads(limit=limit)})
+
+    async def list_tools(request: Request):
+        return JSONResponse(
+            {"tools": [{"name": name, "description": f.__doc__.strip()} for name, f in tools.items()]}
+        )
+
+    async def call_tool(request: Request):
+        name = request.path_params["name"]
+        if name not in tools:
+            return JSONResponse({"error": f"Unknown tool {name}."}, status_code=404)
+        args = await request.json() if await request.body() else {}
+        # only allow the configured netdata hosts and the docs site, not arbitrary urls
+        host_url = args.get("netdata_host_url")
+        if host_url is not None and host_url.rstrip("/") not in allowed_hosts:
+            return JSONResponse({"error": f"Host {host_url} is not allowed."}, status_code=403)
+        if "url" in args and not str(args["url"]).startswith(DOCS_URL_PREFIX):
+            return JSONResponse({"error": f"Only {DOCS_URL_PREFIX} urls are allowed."}, status_code=403)
+        try:
+            result = await run_in_threadpool(tools[name], **args)
+        except TypeError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except client.UrlNotAllowedError as e:
+            return JSONResponse({"error": str(e)}, status_code=403)
+        except Exception as e:
+            return JSONResponse({"error": f"{type(e).__name__}: {e}"}, status_code=502)
+        return JSONResponse({"result": result})
+
+    return Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/chat", chat, methods=["POST"]),
+            Route("/chat/stream", chat_stream, methods=["POST"]),
+            Route("/sessions", sessions),
+            Route("/tools", list_tools),
+            Route("/tools/{name}", call_tool, methods=["POST"]),
+        ]
+    )
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    default_hosts_str = os.environ.get("NETDATA_URL_LIST", "http://localhost:19999")
+    default_hosts = [
+        host.strip() for host in default_hosts_str.split(",") if host.strip()
+    ]
+
+    parser = argparse.ArgumentParser(description="HTTP API server for the Netdata LLM Agent.")
+    parser.add_argument(
+        "--host",
+        nargs="+",
+        default=default_hosts,
+        help="Netdata host URL(s) as a space-separated list. "
+        "Defaults to the list from NETDATA_URL_LIST in the .env file or 'http://localhost:19999'.",
+    )
+    parser.add_argument(
+        "--model", type=str, default="gpt-4o-mini", help="LLM model to use. Default is 'gpt-4o-mini'."
+    )
+    parser.add_argument(
+        "--platform", type=str, default="openai", help="LLM platform to use. Default is 'openai'."
+    )
+    parser.add_argument(
+        "--router-model",
+        type=str,
+        help="Optional fast model for intermediate tool calling steps.",
+    )
+    parser.add_argument(
+        "--router-platform",
+        type=str,
+        help="Platform of the router model. Defaults to --platform.",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        type=str,
+        default=os.environ.get("NETDATA_LLM_CHECKPOINT_DB", ":memory:"),
+        help="SQLite database to persist sessions in. Defaults to NETDATA_LLM_CHECKPOINT_DB or ':memory:'.",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent agent runs (whole turns, tool calls included). Default is 4.",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=32,
+        help="Maximum number of chat requests waiting for a free slot. Default is 32.",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=12,
+        help="Maximum number of model steps per chat turn. Default is 12.",
+    )
+    parser.add_argument(
+        "--max-turn-seconds",
+        type=float,
+        default=120,
+        help="Wall-clock deadline per chat turn in seconds. Default is 120.",
+    )
+    parser.add_argument(
+        "--max-session-age",
+        type=float,
+        default=86400,
+        help="Delete sessions not used for this many seconds. Default is 86400.",
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=1000,
+        help="Keep at most this many of the most recently used sessions. Default is 1000.",
+    )
+    parser.add_argument("--bind", type=str, default="127.0.0.1", help="Address to bind to.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    return parser.parse_args()
+
+
+def run_server():
+    """Entry point for running the API server."""
+    import uvicorn
+
+    args = parse_args()
+    app = create_app(
+        args.host,
+        model=args.model,
+        platform=args.platform,
+        router_model=args.router_model,
+        router_platform=args.router_platform,
+        checkpoint_db=args.checkpoint_db,
+        llm_concurrency=args.llm_concurrency,
+        max_queued=args.max_queued,
+        max_steps=args.max_steps,
+        max_turn_seconds=args.max_turn_seconds,
+        max_session_age=args.max_session_age,
+        max_sessions=args.max_sessions,
+    )
+    uvicorn.run(app, host=args.bind, port=args.port)
+
+
+if __name__ == "__main__":
+    run_server()
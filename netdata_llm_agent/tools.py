@@ -6,9 +6,12 @@ Tools for Netdata LLM Agent.
 """
 
 import json
-import requests
+import time
+from collections import Counter
 import pandas as pd
-from markdownify import markdownify as md
+
+from netdata_llm_agent.client import http_get
+from netdata_llm_agent.docs import extract_docs_page
 
 
 def get_info(netdata_host_url: str) -> str:
@@ -22,7 +25,7 @@ def get_info(netdata_host_url: str) -> str:
         JSON string with system info.
     """
     url = f"{netdata_host_url}/api/v1/info"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     r_json = resp.json()
 
     info = {
@@ -62,7 +65,7 @@ def get_charts(
         JSON string with chart metadata. List of tuples with chart id and title and dimensions if include_dimensions is True.
     """
     url = f"{netdata_host_url}/api/v1/charts"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     r_json = resp.json()
 
     charts = []
@@ -97,7 +100,7 @@ def get_chart_info(netdata_host_url: str, chart: str = "system.cpu") -> str:
         Chart info.
     """
     url = f"{netdata_host_url}/api/v1/chart?chart={chart}"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     chart_data = resp.json()
     chart_info = {
         "id": chart_data["id"],
@@ -113,14 +116,68 @@ def get_chart_info(netdata_host_url: str, chart: str = "system.cpu") -> str:
     return json.dumps(chart_info, indent=2)
 
 
+# budget of values (rows x dimensions) returned by get_chart_data when points is not given
+CHART_DATA_MAX_CELLS = 1200
+CHART_DATA_MIN_POINTS = 10
+
+# units where averaging over a wide window hides the spikes that matter
+PERCENTILE_UNITS = ("ms", "milliseconds", "seconds", "microseconds", "us", "nanoseconds")
+
+
+# netdata treats after/before values up to this many seconds (3 years) as relative, larger ones as timestamps
+API_RELATIVE_TIME_MAX = 3 * 365 * 86400
+
+
+def _query_duration(after: int, before: int) -> int:
+    """
+    Length in seconds of a Netdata after/before time range.
+
+    As in Netdata, a relative before is relative to now and a relative after is relative to before, so after=-600, before=-300 covers 600 seconds.
+    """
+    if abs(after) <= API_RELATIVE_TIME_MAX:
+        return max(abs(after), 1)
+    end = before if abs(before) > API_RELATIVE_TIME_MAX else int(time.time()) + before
+    return max(end - after, 1)
+
+
+def _plan_chart_query(
+    duration: int, update_every: int, dimensions: int, units: str, options: str = None
+) -> tuple:
+    """
+    Pick points and group method for a chart data query so the result fits CHART_DATA_MAX_CELLS.
+
+    Args:
+        duration: Length of the time range in seconds.
+        update_every: Chart collection interval in seconds.
+        dimensions: Number of chart dimensions.
+        units: Chart units.
+        options: Query options.
+
+    Returns:
+        Tuple of (points, group).
+    """
+    samples = max(duration // max(update_every, 1), 1)
+    max_points = max(CHART_DATA_MAX_CELLS // max(dimensions, 1), CHART_DATA_MIN_POINTS)
+    points = min(samples, max_points)
+
+    group = "average"
+    aggregating = samples // points >= 10
+    if aggregating and not (options and "anomaly-bit" in options):
+        if units and units.strip().lower() in PERCENTILE_UNITS:
+            group = "percentile"
+
+    return points, group
+
+
 def get_chart_data(
     netdata_host_url: str,
     chart: str = "system.cpu",
     after: int = -60,
     before: int = 0,
-    points: int = 60,
+    points: int = None,
     options: str = None,
-    df_freq: str = "5s",
+    df_freq: str = None,
+    group: str = None,
 ) -> str:
     """
     Calls Netdata /api/v1/data?chart=chart for a specific chart over a specific time range.
@@ -128,15 +185,31 @@ def get_chart_data(
     Args:
         netdata_host_url: Netdata host url.
         chart: Chart id.
-        after: Seconds before now or timestamp in seconds.
-        before: Seconds after now or timestamp in seconds.
-        points: Number of points to retrieve. Can be used to aggregate data.
+        after: Negative seconds before `before` (e.g. -3600 for the hour up to before) or timestamp in seconds.
+        before: Seconds relative to now (0 for now, negative for the past) or timestamp in seconds.
+        points: Number of points to retrieve. Leave unset to pick automatically from the time range and number of dimensions.
         options: Additional options to pass to the API. 'anomaly-bit' for anomaly rate instead of raw metric values.
-        df_freq: Frequency for the pandas DataFrame. Can be used to resample and aggregate data for larger time ranges.
+        df_freq: Optional frequency to resample the pandas DataFrame to. Usually not needed as Netdata already aggregates to the requested points.
+        group: How Netdata aggregates values into each point, e.g. 'average', 'max', 'min', 'sum', 'median', 'percentile'. Leave unset to pick automatically.
 
     Returns:
         Pandas DataFrame as a string with the chart data.
     """
+    if points is None or group is None:
+        # plan the query from the chart metadata so netdata does the aggregation server side
+        chart_meta = http_get(
+            f"{netdata_host_url}/api/v1/chart", params={"chart": chart}, timeout=5
+        ).json()
+        planned_points, planned_group = _plan_chart_query(
+            _query_duration(after, before),
+            chart_meta.get("update_every", 1),
+            len(chart_meta.get("dimensions", {})),
+            chart_meta.get("units", ""),
+            options,
+        )
+        points = points or planned_points
+        group = group or planned_group
+
     url = f"{netdata_host_url}/api/v1/data"
     query_params = {
         "chart": chart,
@@ -144,20 +217,105 @@ def get_chart_data(
         "before": before,
         "format": "json",
         "points": points,
+        "group": group,
     }
     if options:
         query_params["options"] = options
-    resp = requests.get(url, params=query_params, timeout=5)
+    resp = http_get(url, params=query_params, timeout=5)
     resp_json = resp.json()
     df = pd.DataFrame(resp_json["data"], columns=resp_json["labels"])
     df["time"] = pd.to_datetime(df["time"], unit="s")
     df = df.set_index("time")
-    df = df.asfreq(df_freq)
+    if df_freq:
+        df = df.asfreq(df_freq)
 
     return df.to_string(index=False)
 
 
-def get_alarms(netdata_host_url: str, all: bool = False, active: bool = False) -> str:
+ALARM_FIELDS = [
+    "name",
+    "status",
+    "value",
+    "units",
+    "info",
+    "summary",
+    "chart",
+    "class",
+    "component",
+    "workload",
+    "type",
+    "active",
+    "silenced",
+    "disabled",
+    "lookup_dimensions",
+    "calc",
+    "warn",
+    "crit",
+]
+
+# most severe first, unknown statuses sort last
+ALARM_SEVERITY = ["CRITICAL", "WARNING", "UNDEFINED", "CLEAR", "UNINITIALIZED", "REMOVED"]
+
+# number of top values to count per field in compact mode
+ALARM_COUNTS_TOP = 20
+
+
+def _compact_alarms(alarms: dict, max_rows: int) -> dict:
+    """
+    Convert alarms to a columnar table sorted by severity and recency.
+
+    Fields that are empty for every alarm are dropped, fields with the same value for every alarm are moved to "constants", and counts per status, class, component and chart are computed over all alarms before the rows are capped.
+
+    Args:
+        alarms: Raw alarms from /api/v1/alarms keyed by alarm id.
+        max_rows: Maximum number of rows to return.
+
+    Returns:
+        Dict with fields, rows, constants, total, truncated and counts.
+    """
+    ranked = sorted(
+        alarms.values(),
+        key=lambda a: (
+            ALARM_SEVERITY.index(a.get("status"))
+            if a.get("status") in ALARM_SEVERITY
+            else len(ALARM_SEVERITY),
+            -(a.get("last_status_change") or 0),
+        ),
+    )
+
+    counts = {}
+    for field in ["status", "class", "component", "chart"]:
+        field_counts = Counter(a.get(field) or "" for a in ranked)
+        counts[field] = dict(field_counts.most_common(ALARM_COUNTS_TOP))
+
+    rows = ranked[:max_rows]
+    fields, constants = [], {}
+    for field in [*ALARM_FIELDS, "last_status_change"]:
+        values = [a.get(field, "") for a in rows]
+        if all(v in ("", None) for v in values):
+            continue
+        if len(rows) > 1 and all(v == values[0] for v in values):
+            constants[field] = values[0]
+            continue
+        fields.append(field)
+
+    return {
+        "fields": fields,
+        "rows": [[a.get(field, "") for field in fields] for a in rows],
+        "constants": constants,
+        "total": len(ranked),
+        "truncated": max(len(ranked) - len(rows), 0),
+        "counts": counts,
+    }
+
+
+def get_alarms(
+    netdata_host_url: str,
+    all: bool = False,
+    active: bool = False,
+    compact: bool = False,
+    max_rows: int = 50,
+) -> str:
     """
     Calls Netdata /api/v1/alarms to retrieve information about alarms.
 
@@ -165,35 +323,23 @@ def get_alarms(netdata_host_url: str, all: bool = False, active: bool = False) -
         netdata_host_url: Netdata host url.
         all: Get all enabled alarms regardless of status.
         active: Get only raised alarms in WARNING or CRITICAL status.
+        compact: Return a compact table (fields listed once, one row per alarm) sorted by severity and recency, with counts per status, class, component and chart. Recommended with all=True.
+        max_rows: Maximum number of alarms to return in compact mode.
 
     Returns:
         JSON string with alarm information.
     """
     url = f"{netdata_host_url}/api/v1/alarms?{'all' if all else ''}&{'active' if active else ''}"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     r_json = resp.json()
 
+    if compact:
+        return json.dumps(_compact_alarms(r_json["alarms"], max_rows))
+
     alarms = {}
     for alarm in r_json["alarms"]:
         alarms[alarm] = {
-            "name": r_json["alarms"][alarm].get("name", ""),
-            "status": r_json["alarms"][alarm].get("status", ""),
-            "value": r_json["alarms"][alarm].get("value", ""),
-            "units": r_json["alarms"][alarm].get("units", ""),
-            "info": r_json["alarms"][alarm].get("info", ""),
-            "summary": r_json["alarms"][alarm].get("summary", ""),
-            "chart": r_json["alarms"][alarm].get("chart", ""),
-            "class": r_json["alarms"][alarm].get("class", ""),
-            "component": r_json["alarms"][alarm].get("component", ""),
-            "workload": r_json["alarms"][alarm].get("workload", ""),
-            "type": r_json["alarms"][alarm].get("type", ""),
-            "active": r_json["alarms"][alarm].get("active", ""),
-            "silenced": r_json["alarms"][alarm].get("silenced", ""),
-            "disabled": r_json["alarms"][alarm].get("disabled", ""),
-            "lookup_dimensions": r_json["alarms"][alarm].get("lookup_dimensions", ""),
-            "calc": r_json["alarms"][alarm].get("calc", ""),
-            "warn": r_json["alarms"][alarm].get("warn", ""),
-            "crit": r_json["alarms"][alarm].get("crit", ""),
+            field: r_json["alarms"][alarm].get(field, "") for field in ALARM_FIELDS
         }
 
     return json.dumps(alarms, indent=2)
@@ -211,7 +357,7 @@ def get_current_metrics(netdata_host_url: str, search_term: str = None) -> str:
         JSON string with all metrics and their current values.
     """
     url = f"{netdata_host_url}/api/v1/allmetrics?format=json"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     r_json = resp.json()
     all_metrics = {
         c: {
@@ -243,7 +389,7 @@ def get_anomaly_rates(
         JSON string with anomaly rates for all charts.
     """
     url = f"{netdata_host_url}/api/v1/weights?method=anomaly-rate&after={after}&before={before}"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     r_json = resp.json()
     contexts = r_json["contexts"]
     anomaly_rates = []
@@ -267,7 +413,7 @@ def get_netdata_docs_sitemap(search_term: str = None) -> str:
         JSON string with the sitemap URLs.
     """
     url = "https://learn.netdata.cloud/sitemap.xml"
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
     sitemap = resp.text
     sitemap = [
         s.split("<loc>")[1].split("</loc>")[0] for s in sitemap.split("<url>")[1:]
@@ -278,16 +424,18 @@ def get_netdata_docs_sitemap(search_term: str = None) -> str:
     return json.dumps(sitemap, indent=2)
 
 
-def get_netdata_docs_page(url: str) -> str:
+def get_netdata_docs_page(url: str, sections: str = None, max_chars: int = 20000) -> str:
     """
     Calls Netdata Learn (docs site) to retrieve the content of a specific documentation page.
 
     Args:
         url: URL of the documentation page.
+        sections: Optional comma separated terms to only return the sections whose heading contains one of them, e.g. 'configuration,alerts'.
+        max_chars: Maximum number of characters to return. If the page is longer it is truncated and the list of sections is included so specific sections can be requested.
 
     Returns:
-        Markdown rendering of the HTML content of the documentation page.
+        Markdown of the main content of the documentation page (navigation, sidebars and footers removed).
     """
-    resp = requests.get(url, timeout=5)
+    resp = http_get(url, timeout=5)
 
-    return md(resp.text)
+    return extract_docs_page(resp.text, base_url=url, sections=sections, max_chars=max_chars)
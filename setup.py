@@ -46,6 +46,7 @@ setup(
         "console_scripts": [
             "netdata-llm-cli=netdata_llm_agent.cli:main",
             "netdata-llm-app=netdata_llm_agent.app:run_app",
+            "netdata-llm-server=netdata_llm_agent.server:run_server",
         ],
     },
 )
@@ -0,0 +1,40 @@
+import pytest
+
+from netdata_llm_agent import client
+from netdata_llm_agent.agent import NetdataLLMAgent
+from netdata_llm_agent.evaluation import LocalChatModel
+
+
+class NetdataResponse:
+    """Stand-in for a Netdata response, a host with no charts."""
+
+    status_code = 200
+    text = "{}"
+
+    def json(self):
+        return {"charts": {}}
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def local_agent(monkeypatch):
+    """
+    Answer all Netdata requests with a NetdataResponse and create agents with the local stand-in model.
+
+    Returns the list of urls requested.
+    """
+    requested = []
+
+    def get(url, *args, **kwargs):
+        requested.append(url)
+        return NetdataResponse()
+
+    # the server restricts the client's urls process wide, restore it afterwards
+    monkeypatch.setattr(client, "_allowed_urls", None)
+    monkeypatch.setattr(client._session, "get", get)
+    monkeypatch.setattr(
+        NetdataLLMAgent, "_create_llm", lambda self, model, platform=None: LocalChatModel()
+    )
+    return requested
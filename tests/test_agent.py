@@ -0,0 +1,139 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from netdata_llm_agent.agent import NetdataLLMAgent, usage_summary
+from netdata_llm_agent.evaluation import LocalChatModel
+
+HOSTS = ["http://localhost:19999"]
+
+
+def _agent(platform, **kwargs):
+    return NetdataLLMAgent(HOSTS, platform=platform, llm=LocalChatModel(), **kwargs)
+
+
+def test_system_message_has_cache_breakpoints_for_anthropic():
+    agent = _agent("anthropic")
+
+    content = agent._create_system_message("anthropic").content
+
+    assert isinstance(content, list) and len(content) == 2
+    assert all(block["cache_control"] == {"type": "ephemeral"} for block in content)
+    assert content[0]["text"] == agent.base_system_prompt
+    assert HOSTS[0] in content[1]["text"]
+
+
+def test_system_message_is_plain_for_openai_and_without_prompt_caching():
+    assert _agent("openai")._create_system_message("openai").content == _agent("openai").system_prompt
+
+    content = _agent("anthropic", prompt_caching=False)._create_system_message("anthropic").content
+    assert isinstance(content, str)
+
+
+def test_system_prompt_starts_with_the_static_base_prompt():
+    agent = _agent("openai")
+
+    assert agent.system_prompt.startswith(agent.base_system_prompt)
+
+
+def test_history_limit_trims_the_stored_conversation(local_agent):
+    agent = _agent("openai", checkpoint_db=":memory:", max_history_messages=4)
+
+    for question in ["cpu usage?", "ram usage?", "disk usage?"]:
+        agent.chat(question, continue_chat=True)
+
+    messages = agent.agent.get_state({"configurable": {"thread_id": agent.thread_id}}).values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "tool", "ai"]
+    assert messages[0].content == "disk usage?"
+    assert agent.messages["messages"] == messages
+    assert agent.conversation_store.list_threads()[0]["messages"] == 4
+
+
+def test_usage_summary_reads_prompt_cache_details():
+    messages = [
+        HumanMessage(content="cpu?"),
+        AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 3000,
+                "output_tokens": 20,
+                "total_tokens": 3020,
+                "input_token_details": {"cache_read": 2800, "cache_creation": 0},
+            },
+        ),
+        ToolMessage(content="{}", tool_call_id="1"),
+        AIMessage(
+            content="fine",
+            usage_metadata={
+                "input_tokens": 3100,
+                "output_tokens": 50,
+                "total_tokens": 3150,
+                "input_token_details": {"cache_creation": 3000},
+            },
+        ),
+        AIMessage(content="cached answer, no usage"),
+    ]
+
+    assert usage_summary(messages) == {
+        "llm_calls": 2,
+        "input_tokens": 6100,
+        "cached_input_tokens": 2800,
+        "cache_creation_input_tokens": 3000,
+        "uncached_input_tokens": 3300,
+        "output_tokens": 70,
+    }
+
+
+class _AnthropicStub(BaseHTTPRequestHandler):
+    """Minimal Anthropic messages endpoint that records requests and reports a prompt cache hit."""
+
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        response = {
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": "All good."}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": 50,
+                "output_tokens": 5,
+                "cache_read_input_tokens": 2000,
+                "cache_creation_input_tokens": 0,
+            },
+        }
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_anthropic_requests_carry_cache_control(monkeypatch):
+    pytest.importorskip("langchain_anthropic")
+    stub = HTTPServer(("127.0.0.1", 0), _AnthropicStub)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_URL", f"http://127.0.0.1:{stub.server_port}")
+    try:
+        agent = NetdataLLMAgent(HOSTS, model="claude-3-5-sonnet-20241022", platform="anthropic")
+        agent.chat("hello")
+    finally:
+        stub.shutdown()
+
+    system = _AnthropicStub.requests[-1]["system"]
+    assert [block.get("cache_control") for block in system] == [{"type": "ephemeral"}] * 2
+    assert agent.last_usage["cached_input_tokens"] == 2000
+    assert agent.last_usage["input_tokens"] == 2050
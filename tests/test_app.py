@@ -0,0 +1,70 @@
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from netdata_llm_agent.agent import NetdataLLMAgent
+
+EXPIRED = "This conversation expired after being idle and was cleared, a new one has been started."
+
+
+@pytest.fixture(autouse=True)
+def app_env(local_agent, monkeypatch):
+    monkeypatch.setenv("NETDATA_LLM_APP_MAX_THREADS", "1")
+    # the store, agent and active threads are shared through st.cache_resource
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+
+def _session():
+    return AppTest.from_file("../netdata_llm_agent/app.py", default_timeout=30).run()
+
+
+def _ask(at, question):
+    at.text_input("input").input(question)
+    next(b for b in at.button if b.label == "Send").click()
+    return at.run()
+
+
+def test_prune_skips_threads_of_live_sessions():
+    a, b = _session(), _session()
+
+    _ask(a, "cpu usage?")
+    _ask(b, "ram usage?")
+    _ask(a, "disk usage?")
+
+    assert not a.exception and not b.exception
+    assert [i.value for i in a.info] == []
+    assert len(a.session_state.conversation) == 4
+
+
+def test_session_is_reset_when_its_thread_was_pruned(monkeypatch):
+    monkeypatch.setenv("NETDATA_LLM_APP_SESSION_IDLE_SECONDS", "0")
+    a, b = _session(), _session()
+
+    _ask(a, "cpu usage?")
+    _ask(b, "ram usage?")
+    _ask(a, "disk usage?")
+
+    assert [i.value for i in a.info] == [EXPIRED]
+    assert [r["content"] for r in a.session_state.conversation][0] == "disk usage?"
+
+
+def test_agents_per_url_set_are_bounded(monkeypatch):
+    monkeypatch.setenv("NETDATA_LLM_APP_MAX_AGENTS", "2")
+    created = []
+    init = NetdataLLMAgent.__init__
+    monkeypatch.setattr(
+        NetdataLLMAgent, "__init__", lambda self, *a, **kw: created.append(a[0]) or init(self, *a, **kw)
+    )
+    at = _session()
+
+    for i in [0, 1, 2, 0]:
+        at.sidebar.text_area[0].input(f"http://host{i}:19999/")
+        next(b for b in at.sidebar.button if b.label == "Update Netdata URLs").click()
+        at.run()
+        _ask(at, "cpu usage?")
+
+    assert not at.exception
+    # host0's agent was dropped for host2's and is created again
+    assert [urls[0] for urls in created[-4:]] == [f"http://host{i}:19999/" for i in [0, 1, 2, 0]]
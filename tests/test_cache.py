@@ -0,0 +1,80 @@
+import pytest
+
+from netdata_llm_agent.cache import AnswerCache
+
+HOSTS = ["https://london3.my-netdata.io/", "http://localhost:19999/"]
+
+
+@pytest.mark.parametrize(
+    "question, ttl",
+    [
+        ("What is the CPU utilization on london?", 300),
+        ("What is the free disk space % on london", 300),
+        ("How to reduce RAM usage on london", 300),
+        ("how do I configure the london node?", 300),
+        ("configure london", 300),
+        ("any active alarms right now?", 60),
+        ("what is the latest cpu on london?", 60),
+        ("where are the docs for the redis collector?", 86400),
+        ("How do I install netdata on ubuntu?", 86400),
+        ("how do I configure health notifications?", 86400),
+        ("what is netdata?", 300),
+    ],
+)
+def test_ttl_for(question, ttl):
+    cache = AnswerCache(ttl_seconds=300, live_ttl_seconds=60, static_ttl_seconds=86400)
+    assert cache.ttl_for(question, HOSTS) == ttl
+
+
+def test_exact_match_after_normalization():
+    cache = AnswerCache()
+    cache.put("How much RAM does london have?", HOSTS, "8GB")
+
+    assert cache.get("how much ram does london have", HOSTS) == "8GB"
+    assert cache.get("how much ram does london have", ["http://other:19999"]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_similarity_threshold():
+    question = "how much ram does london have"
+    similar = "how much ram does london have installed"
+    different = "how much disk space does london have"
+
+    exact = AnswerCache()
+    exact.put(question, HOSTS, "8GB")
+    assert exact.get(similar, HOSTS) is None
+
+    fuzzy = AnswerCache(similarity_threshold=0.8)
+    fuzzy.put(question, HOSTS, "8GB")
+    fuzzy.put("how many cpu cores does london have", HOSTS, "4")
+    assert fuzzy.get(similar, HOSTS) == "8GB"
+    assert fuzzy.get(different, HOSTS) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "what was the peak cpu usage on london over the last 2 hours",
+        "what was the peak cpu usage on bangalore over the last 24 hours",
+        "what was the lowest cpu usage on london over the last 24 hours",
+        "what was the peak cpu usage on london over the last 24 days",
+    ],
+)
+def test_similarity_needs_the_same_numbers_units_hosts_and_qualifiers(question):
+    hosts = ["https://london3.my-netdata.io/", "https://bangalore.my-netdata.io/"]
+    cache = AnswerCache(similarity_threshold=0.8)
+    cache.put("what was the peak cpu usage on london over the last 24 hours", hosts, "95%")
+
+    assert cache.get(question, hosts) is None
+    assert cache.get("what was the peak cpu usage on london over last 24 hours", hosts) == "95%"
+
+
+def test_expired_entries_are_not_served(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("netdata_llm_agent.cache.time.time", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=300)
+    cache.put("how much ram does london have", HOSTS, "8GB")
+
+    now[0] += 301
+
+    assert cache.get("how much ram does london have", HOSTS) is None
@@ -0,0 +1,108 @@
+import os
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from netdata_llm_agent.checkpoints import ConversationStore
+
+
+def _graph(store):
+    """Two step graph so each turn writes several checkpoints."""
+
+    def first(state):
+        return {"messages": [AIMessage(content="thinking " * 50)]}
+
+    def second(state):
+        return {"messages": [AIMessage(content="answer")]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.add_edge(START, "first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=store.saver)
+
+
+def _turn(store, graph, thread_id, message="hi"):
+    config = {"configurable": {"thread_id": thread_id}}
+    state = graph.invoke({"messages": [HumanMessage(content=message)]}, config)
+    store.record_turn(thread_id, title=message, messages=len(state["messages"]))
+    return config
+
+
+def _checkpoints(store, thread_id):
+    return store.conn.execute(
+        "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (thread_id,)
+    ).fetchone()[0]
+
+
+def _free_pages(store):
+    return store.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def test_compact_thread_keeps_latest_state():
+    store = ConversationStore()
+    graph = _graph(store)
+    config = _turn(store, graph, "t1")
+    _turn(store, graph, "t1", "again")
+    assert _checkpoints(store, "t1") > 1
+
+    store.compact_thread("t1")
+
+    assert _checkpoints(store, "t1") == 1
+    messages = graph.get_state(config).values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "ai", "human", "ai", "ai"]
+
+
+def test_prune_by_age_and_count():
+    store = ConversationStore()
+    graph = _graph(store)
+    for thread_id in ["old", "a", "b", "c"]:
+        _turn(store, graph, thread_id)
+    store.conn.execute("UPDATE threads SET updated_at = ? WHERE thread_id = 'old'", (time.time() - 3600,))
+    for i, thread_id in enumerate(["a", "b", "c"]):
+        store.conn.execute("UPDATE threads SET updated_at = ? WHERE thread_id = ?", (time.time() + i, thread_id))
+
+    assert store.prune(max_age_seconds=60) == 1
+    assert store.prune(max_threads=2) == 1
+
+    assert [t["thread_id"] for t in store.list_threads()] == ["c", "b"]
+    assert _checkpoints(store, "old") == 0
+    assert _checkpoints(store, "a") == 0
+    assert store.has_thread("c") and not store.has_thread("a")
+
+
+def test_prune_skips_threads_in_use():
+    store = ConversationStore()
+    graph = _graph(store)
+    for i, thread_id in enumerate(["live", "a", "b"]):
+        _turn(store, graph, thread_id)
+        store.conn.execute("UPDATE threads SET updated_at = ? WHERE thread_id = ?", (time.time() + i, thread_id))
+
+    assert store.prune(max_threads=1, keep={"live"}) == 1
+
+    assert sorted(t["thread_id"] for t in store.list_threads()) == ["b", "live"]
+
+
+def test_prune_by_size_keeps_most_recent(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.db"))
+    graph = _graph(store)
+    for i, thread_id in enumerate(["a", "b", "c"]):
+        _turn(store, graph, thread_id)
+        store.compact_thread(thread_id)
+        store.conn.execute("UPDATE threads SET updated_at = ? WHERE thread_id = ?", (time.time() + i, thread_id))
+    size = store.thread_size_bytes("b") + store.thread_size_bytes("c")
+    assert size > 0
+
+    assert store.prune(max_bytes=size) == 1
+
+    assert [t["thread_id"] for t in store.list_threads()] == ["c", "b"]
+    assert store.thread_size_bytes("a") == 0
+    assert os.path.exists(tmp_path / "conversations.db")
+    # freed pages are only given back when asked to vacuum
+    assert _free_pages(store) > 0
+    store.conn.execute("UPDATE threads SET updated_at = 0 WHERE thread_id = 'b'")
+    assert store.prune(max_age_seconds=60, vacuum=True) == 1
+    assert _free_pages(store) == 0
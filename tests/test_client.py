@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from netdata_llm_agent import client
+
+
+class _Response:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+class _Get:
+    """Stand-in for the session's get that counts calls and can block or fail."""
+
+    def __init__(self, status_code=200, error=None, release=None):
+        self.status_code = status_code
+        self.error = error
+        self.release = release
+        self.calls = 0
+        self.started = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, url, params=None, timeout=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return _Response(self.status_code)
+
+
+@pytest.fixture(autouse=True)
+def fresh_hosts(monkeypatch):
+    monkeypatch.setattr(client, "_hosts", {})
+    monkeypatch.setattr(client, "_in_flight", {})
+    monkeypatch.setattr(client, "BREAKER_THRESHOLD", 3)
+    monkeypatch.setattr(client, "BREAKER_COOLDOWN", 0.2)
+
+
+def _run_concurrently(n, func):
+    results, errors = [], []
+
+    def target():
+        try:
+            results.append(func())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_identical_calls_make_one_request(monkeypatch):
+    release = threading.Event()
+    get = _Get(release=release)
+    monkeypatch.setattr(client._session, "get", get)
+
+    url = "http://host-a:19999/api/v1/info"
+    threads, results, errors = _run_concurrently(8, lambda: client.http_get(url, params={"a": 1}))
+    get.started.wait(5)
+    # give the followers time to find the leader's call in flight
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert get.calls == 1
+    assert errors == []
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+    assert client._in_flight == {}
+
+
+def test_followers_get_the_leaders_error(monkeypatch):
+    release = threading.Event()
+    get = _Get(error=requests.exceptions.ConnectTimeout("timed out"), release=release)
+    monkeypatch.setattr(client._session, "get", get)
+
+    url = "http://host-b:19999/api/v1/info"
+    threads, results, errors = _run_concurrently(4, lambda: client.http_get(url))
+    get.started.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert get.calls == 1
+    assert results == []
+    assert len(errors) == 4
+    assert all(isinstance(e, requests.exceptions.ConnectTimeout) for e in errors)
+    assert client._in_flight == {}
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial(monkeypatch):
+    get = _Get(error=requests.exceptions.ConnectionError("refused"))
+    monkeypatch.setattr(client._session, "get", get)
+    url = "http://host-c:19999/api/v1/info"
+
+    for _ in range(client.BREAKER_THRESHOLD):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.http_get(url)
+    assert get.calls == client.BREAKER_THRESHOLD
+
+    # open, fails fast without a request
+    with pytest.raises(client.HostUnavailableError):
+        client.http_get(url)
+    assert get.calls == client.BREAKER_THRESHOLD
+
+    # after the cooldown exactly one of several concurrent callers gets through as the trial
+    time.sleep(client.BREAKER_COOLDOWN + 0.05)
+    release = threading.Event()
+    trial = _Get(release=release)
+    monkeypatch.setattr(client._session, "get", trial)
+    urls = iter(f"{url}?n={i}" for i in range(6))
+    threads, results, errors = _run_concurrently(6, lambda: client.http_get(next(urls)))
+    trial.started.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert trial.calls == 1
+    assert len(results) == 1
+    assert len(errors) == 5
+    assert all(isinstance(e, client.HostUnavailableError) for e in errors)
+
+    # the successful trial closes the breaker
+    client.http_get(url)
+    assert trial.calls == 2
+
+
+def test_failed_trial_reopens_the_breaker(monkeypatch):
+    get = _Get(status_code=503)
+    monkeypatch.setattr(client._session, "get", get)
+    url = "http://host-d:19999/api/v1/info"
+
+    for _ in range(client.BREAKER_THRESHOLD):
+        client.http_get(url)
+    time.sleep(client.BREAKER_COOLDOWN + 0.05)
+    client.http_get(url)
+
+    with pytest.raises(client.HostUnavailableError):
+        client.http_get(url)
+    assert get.calls == client.BREAKER_THRESHOLD + 1
+
+
+def test_token_bucket_with_no_rate_does_not_limit():
+    bucket = client.TokenBucket(rate=0, burst=0)
+
+    start = time.monotonic()
+    for _ in range(100):
+        bucket.acquire()
+
+    assert time.monotonic() - start < 1
+
+
+def test_token_bucket_waits_for_a_token():
+    bucket = client.TokenBucket(rate=20, burst=1)
+
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+
+    assert time.monotonic() - start >= 0.09
+
+
+def test_allowed_urls_refuse_other_hosts_and_redirects(monkeypatch):
+    monkeypatch.setattr(client, "_allowed_urls", None)
+    client.set_allowed_urls(["http://localhost:19999", "https://learn.netdata.cloud/"])
+    get = _Get()
+    monkeypatch.setattr(client._session, "get", get)
+
+    with pytest.raises(client.UrlNotAllowedError):
+        client.http_get("http://10.0.0.1:19999/api/v1/info")
+    assert get.calls == 0
+
+    redirect = requests.Response()
+    redirect.status_code = 302
+    redirect.url = "https://learn.netdata.cloud/docs/x"
+    redirect.headers["location"] = "http://10.0.0.1/"
+    with pytest.raises(client.UrlNotAllowedError):
+        client._check_redirect(redirect)
+    redirect.headers["location"] = "/docs/y"
+    client._check_redirect(redirect)
@@ -0,0 +1,106 @@
+import os
+
+from netdata_llm_agent.docs import extract_docs_page, html_to_markdown, outline, select_sections
+from netdata_llm_agent.inventory import estimate_tokens
+
+PAGE = """
+<html><head><title>Redis</title><script>var x = "<main>";</script></head>
+<body>
+<nav class="navbar"><a href="/docs">Docs</a></nav>
+<div class="theme-doc-sidebar-container"><ul><li>Sidebar link</li></ul></div>
+<main>
+<article>
+<header><h1>Redis collector</h1></header>
+<p>Collects <code>redis</code> metrics from <a href="/docs/redis">Redis</a>.</p>
+<h2>Setup<a class="hash-link" href="#setup">#</a></h2>
+<pre><code>jobs:
+  - name: local
+    address: redis://127.0.0.1:6379
+</code></pre>
+<h3>Options</h3>
+<ul><li>address<ul><li>nested</li></ul></li><li>timeout</li></ul>
+<h2>Metrics</h2>
+<table><tr><th>Metric</th><th>Units</th></tr><tr><td>redis.memory</td><td>bytes</td></tr></table>
+</article>
+<footer>Footer text</footer>
+</main>
+</body></html>
+"""
+
+
+def test_html_to_markdown_keeps_only_the_article():
+    md = html_to_markdown(PAGE, base_url="https://learn.netdata.cloud/docs/x")
+
+    assert md.startswith("# Redis collector")
+    assert "Sidebar link" not in md
+    assert "Footer text" not in md
+    assert "Docs" not in md.split("\n")[0]
+    assert "[Redis](https://learn.netdata.cloud/docs/redis)" in md
+    assert "`redis`" in md
+    assert "## Setup\n" in md
+
+
+def test_code_indentation_and_nested_lists_are_kept():
+    md = html_to_markdown(PAGE)
+
+    assert "```\njobs:\n  - name: local\n    address: redis://127.0.0.1:6379\n" in md
+    assert "- address\n  - nested\n- timeout" in md
+    assert "| Metric | Units |" in md
+
+
+def test_select_sections_includes_subsections():
+    md = html_to_markdown(PAGE)
+
+    setup = select_sections(md, ["setup"])
+
+    assert setup.startswith("## Setup")
+    assert "### Options" in setup
+    assert "## Metrics" not in setup
+    assert select_sections(md, ["nope"]) == ""
+
+
+def test_outline_and_unknown_section():
+    md = html_to_markdown(PAGE)
+
+    assert outline(md) == "- Redis collector\n  - Setup\n    - Options\n  - Metrics"
+    assert "Available sections" in extract_docs_page(PAGE, sections="nope")
+
+
+def test_truncation_appends_outline():
+    out = extract_docs_page(PAGE, max_chars=60)
+
+    assert "[truncated" in out
+    assert "- Metrics" in out
+
+
+def test_root_mentioned_only_in_a_script_falls_back_to_the_body():
+    html = """
+<html><head><script>document.querySelector("<main>"); // <article></script></head>
+<body><!-- <main> --><div><h1>Install</h1><p>Run the kickstart script.</p></div></body></html>
+"""
+
+    md = html_to_markdown(html)
+
+    assert md.startswith("# Install")
+    assert "Run the kickstart script." in md
+    assert "querySelector" not in md
+
+
+def test_docs_site_page_fixture():
+    path = os.path.join(os.path.dirname(__file__), "fixtures", "docs_redis.html")
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+
+    md = html_to_markdown(html, base_url="https://learn.netdata.cloud/docs/collecting-metrics/databases/redis")
+
+    assert md.startswith("# Redis")
+    assert "| redis.memory | max, used, rss, peak, dataset, lua, scripts | bytes |" in md
+    assert "sudo ./edit-config go.d/redis.conf" in md
+    # navigation, sidebar, table of contents and footer are dropped
+    for boilerplate in ("Skip to main content", "Docs sidebar", "Edit this page", "Copyright", "Previous"):
+        assert boilerplate not in md
+    assert estimate_tokens(md) < estimate_tokens(html) // 10
+    setup = select_sections(md, ["setup"])
+    assert setup.startswith("## Setup")
+    assert "#### Options" in setup
+    assert "## Troubleshooting" not in setup
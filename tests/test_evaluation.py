@@ -0,0 +1,111 @@
+import json
+import sys
+
+import pytest
+
+from netdata_llm_agent import evaluation
+
+FIXTURES = "example_chats/eval_fixtures.json"
+CHAT = """You: any active alarms recently on any of my nodes?
+
+Agent: Two warnings on localhost.
+
+You: /save
+
+You: how much free disk space have i got on each node?
+"""
+
+
+@pytest.fixture
+def chats(tmp_path):
+    chats_dir = tmp_path / "chats"
+    chats_dir.mkdir()
+    (chats_dir / "good_alarms.md").write_text(CHAT)
+    return chats_dir
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["evaluation", "--host", "http://localhost:19999", *args])
+    return evaluation.main()
+
+
+def test_load_transcripts_skips_commands(chats):
+    transcripts = evaluation.load_transcripts(str(chats))
+
+    assert transcripts == [
+        {
+            "name": "good_alarms",
+            "label": "good",
+            "questions": [
+                "any active alarms recently on any of my nodes?",
+                "how much free disk space have i got on each node?",
+            ],
+        }
+    ]
+
+
+def test_missing_baseline_fails(monkeypatch, chats, tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+
+    assert run(monkeypatch, "--chats", str(chats), "--fixtures", FIXTURES, "--baseline", baseline) == 1
+
+
+def test_replay_against_baseline(monkeypatch, chats, tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    common = ["--chats", str(chats), "--fixtures", FIXTURES, "--baseline", baseline]
+
+    assert run(monkeypatch, *common, "--update-baseline") == 0
+    assert run(monkeypatch, *common) == 0
+
+    # a question that is not in the baseline is not let through
+    with open(chats / "good_alarms.md", "a") as f:
+        f.write("\nYou: what is the cpu usage?\n")
+    assert run(monkeypatch, *common) == 1
+
+
+def test_missing_fixtures_fail(monkeypatch, chats, tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    fixtures = str(tmp_path / "empty.json")
+
+    assert run(monkeypatch, "--chats", str(chats), "--fixtures", FIXTURES, "--baseline", baseline, "--update-baseline") == 0
+    assert run(monkeypatch, "--chats", str(chats), "--fixtures", fixtures, "--baseline", baseline) == 1
+
+
+def test_committed_baseline_covers_the_example_chats():
+    with open(evaluation.DEFAULT_BASELINE, encoding="utf-8") as f:
+        baseline = {r["id"] for r in json.load(f)}
+    ids = {
+        f"{t['name']}#{i}"
+        for t in evaluation.load_transcripts(evaluation.DEFAULT_CHATS_DIR)
+        for i in range(len(t["questions"]))
+    }
+
+    assert ids == baseline
+
+
+def test_compare_flags_regressions_and_unknown_ids():
+    base = {"id": "a#0", "error": None, "steps": 2, "tool_calls": 1, "input_tokens": 1000, "output_tokens": 50, "wall_time": 0.1}
+    worse = dict(base, tool_calls=3)
+
+    assert evaluation.compare([base], [base]) == []
+    assert evaluation.compare([worse], [base]) == ["a#0: tool_calls 3 > 2 (baseline 1)"]
+    assert evaluation.compare([dict(base, id="b#0")], [base]) == [
+        "b#0: no baseline entry, run with --update-baseline to add it"
+    ]
+
+
+def test_compare_flags_changed_tools_and_good_answers():
+    base = {
+        "id": "good_a#0", "label": "good", "error": None, "steps": 2, "tool_calls": 1, "input_tokens": 1000,
+        "output_tokens": 50, "wall_time": 0.1, "tools": ["get_alarms"], "answer": "Two warnings.",
+    }
+
+    assert evaluation.compare([dict(base, tools=["get_charts"])], [base]) == [
+        "good_a#0: tools [get_charts] != baseline [get_alarms]"
+    ]
+    assert evaluation.compare([dict(base, answer="No alarms.")], [base]) == [
+        "good_a#0: answer changed from the good baseline answer 'Two warnings.'"
+    ]
+    # only answers of good transcripts are held to the baseline, and only when asked to
+    assert evaluation.compare([dict(base, answer="No alarms.", label="bad")], [dict(base, label="bad")]) == []
+    assert evaluation.compare([dict(base, answer="No alarms.")], [base], answers=False) == []
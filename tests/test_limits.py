@@ -0,0 +1,114 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from netdata_llm_agent import tools
+from netdata_llm_agent.limits import NARROWING_HINTS, cap_tool_output, trim_history, truncate_output
+
+
+def test_small_output_is_unchanged():
+    text = json.dumps({"a": 1})
+
+    assert truncate_output(text, 100, "get_charts") == text
+
+
+def test_json_object_keeps_leading_entries_and_stays_valid():
+    charts = {f"chart{i}": {"title": "x" * 40} for i in range(500)}
+
+    out = truncate_output(json.dumps(charts, indent=2), 200, "get_charts")
+
+    body, note = out.split("\n\n[", 1)
+    kept = json.loads(body)
+    assert 0 < len(kept) < 500
+    assert list(kept) == [f"chart{i}" for i in range(len(kept))]
+    assert len(body) <= 200 * 4
+    assert f"showing {len(kept)} of 500 entries" in note
+    assert NARROWING_HINTS["get_charts"] in note
+
+
+class _AlarmsResponse:
+    def __init__(self, alarms):
+        self.alarms = alarms
+
+    def json(self):
+        return {"alarms": self.alarms}
+
+
+def test_compact_alarms_keep_counts_and_total_when_capped(monkeypatch):
+    alarms = {
+        f"system.alarm_{i}": {
+            "id": i,
+            "name": f"alarm_{i}",
+            "chart": f"chart.{i % 7}",
+            "status": "WARNING" if i % 3 else "CRITICAL",
+            "class": "Utilization",
+            "component": f"component {i % 5}",
+            "value": i / 10,
+            "units": "%",
+            "info": f"utilization of resource {i} over the last 10 minutes",
+            "last_status_change": 1738590000 + i,
+        }
+        for i in range(1000)
+    }
+    monkeypatch.setattr(tools, "http_get", lambda *args, **kwargs: _AlarmsResponse(alarms))
+
+    out = cap_tool_output(tools.get_alarms, 8000)("http://localhost:19999", compact=True, max_rows=1000)
+
+    body, note = out.split("\n\n[", 1)
+    table = json.loads(body)
+    assert table["total"] == 1000
+    assert sum(table["counts"]["status"].values()) == 1000
+    assert 0 < len(table["rows"]) < 1000
+    assert len(table["rows"][0]) == len(table["fields"])
+    assert f"showing {len(table['rows'])} of 1000 entries of rows" in note
+
+
+def test_text_is_cut_at_a_line_boundary():
+    text = "\n".join(f"row {i:05d}" for i in range(2000))
+
+    out = truncate_output(text, 100, "get_chart_data")
+
+    body = out.split("\n\n[", 1)[0]
+    assert body.endswith(("0", "1", "2", "3", "4", "5", "6", "7", "8", "9"))
+    assert all(line.startswith("row ") for line in body.split("\n"))
+    assert NARROWING_HINTS["get_chart_data"] in out
+
+
+def test_cap_tool_output_keeps_the_tool_signature():
+    def get_things(netdata_host_url: str, search_term: str = None) -> str:
+        """Get things."""
+        return "x\n" * 10000
+
+    capped = cap_tool_output(get_things, 50)
+
+    assert capped.__name__ == "get_things"
+    assert capped.__doc__ == "Get things."
+    assert capped.__wrapped__ is get_things
+    assert "narrow the query" in capped("http://localhost:19999")
+    assert cap_tool_output(get_things, None) is get_things
+
+
+def _turn(i, tool_steps=1):
+    messages = [HumanMessage(content=f"q{i}")]
+    for j in range(tool_steps):
+        call_id = f"call_{i}_{j}"
+        messages.append(AIMessage(content="", tool_calls=[{"name": "get_charts", "args": {}, "id": call_id}]))
+        messages.append(ToolMessage(content="[]", tool_call_id=call_id, name="get_charts"))
+    messages.append(AIMessage(content=f"a{i}"))
+    return messages
+
+
+def test_trim_history_starts_on_a_user_message():
+    messages = [m for i in range(3) for m in _turn(i)]
+
+    assert trim_history(messages, None) == messages
+    assert trim_history(messages, len(messages)) == messages
+    # 5 messages would start on q1's tool call, so trimming continues to the next user message
+    assert [m.content for m in trim_history(messages, 5)] == ["q2", "", "[]", "a2"]
+    assert [m.content for m in trim_history(messages, 8)][0] == "q1"
+
+
+def test_trim_history_keeps_the_latest_turn_whole():
+    messages = _turn(0) + _turn(1, tool_steps=4)
+
+    assert trim_history(messages, 3) == messages[4:]
@@ -0,0 +1,100 @@
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from netdata_llm_agent.agent import NetdataLLMAgent, usage_summary
+from netdata_llm_agent.routing import _escalation_reason, _stream_fast, routing_summary
+
+TOOLS = {"get_charts", "get_alarms"}
+
+
+def _ai(*calls):
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": args, "id": str(i)} for i, (name, args) in enumerate(calls)],
+    )
+
+
+def test_escalation_reasons():
+    history = [HumanMessage(content="cpu?")]
+
+    assert _escalation_reason(AIMessage(content="done"), history, TOOLS) == "final_answer"
+    assert _escalation_reason(_ai(("get_info", {})), history, TOOLS) == "unknown_tool"
+    assert _escalation_reason(_ai(("get_charts", {"search_term": "cpu"})), history, TOOLS) is None
+
+    repeated = [*history, _ai(("get_charts", {"search_term": "cpu"}))]
+    assert (
+        _escalation_reason(_ai(("get_charts", {"search_term": "cpu"})), repeated, TOOLS)
+        == "repeated_tool_call"
+    )
+    assert _escalation_reason(_ai(("get_charts", {"search_term": "ram"})), repeated, TOOLS) is None
+
+
+@pytest.fixture
+def routed_agent(local_agent):
+    return NetdataLLMAgent(["http://localhost:19999"], router_model="fast")
+
+
+def test_discarded_fast_call_usage_is_counted(routed_agent):
+    messages = routed_agent.chat("cpu usage?", return_thinking=True)
+
+    answer = messages[-1]
+    routing = answer.response_metadata["routing"]
+    assert routing["model"] == "strong" and routing["escalation"] == "final_answer"
+    discarded = routing["discarded_usage"]
+    assert discarded["input_tokens"] > 0
+
+    usage = usage_summary(messages)
+    kept_calls = [m for m in messages if m.type == "ai"]
+    assert usage["llm_calls"] == len(kept_calls) + 1
+    assert usage["input_tokens"] == (
+        sum(m.usage_metadata["input_tokens"] for m in kept_calls) + discarded["input_tokens"]
+    )
+    assert routing_summary(messages)["escalations"] == {"final_answer": 1}
+    assert routed_agent.last_usage == usage
+
+
+class _StreamingModel(BaseChatModel):
+    """Streams a long text answer, or a tool call, one chunk at a time and counts the chunks sent."""
+
+    tool_call: bool = False
+    sent: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-test"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.tool_call:
+            for i, part in enumerate(['{"search_', 'term": "cpu"}']):
+                self.sent += 1
+                chunk = {"name": "get_charts" if i == 0 else None, "args": part, "id": "1" if i == 0 else None, "index": 0}
+                yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[chunk]))
+            return
+        for _ in range(1000):
+            self.sent += 1
+            yield ChatGenerationChunk(message=AIMessageChunk(content="word "))
+
+
+def test_fast_model_is_stopped_when_it_writes_an_answer():
+    model = _StreamingModel()
+
+    response, stopped = _stream_fast(model, [HumanMessage(content="cpu?")])
+
+    assert stopped
+    assert model.sent < 30
+    assert response.usage_metadata["input_tokens"] > 0
+
+
+def test_fast_model_tool_calls_are_streamed_whole():
+    model = _StreamingModel(tool_call=True)
+
+    response, stopped = _stream_fast(model, [HumanMessage(content="cpu?")])
+
+    assert not stopped
+    assert isinstance(response, AIMessage)
+    assert response.tool_calls == [{"name": "get_charts", "args": {"search_term": "cpu"}, "id": "1", "type": "tool_call"}]
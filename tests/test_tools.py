@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from netdata_llm_agent import tools
+from netdata_llm_agent.tools import _compact_alarms, _plan_chart_query, _query_duration
+
+
+@pytest.mark.parametrize(
+    "after, before, duration",
+    [
+        (-3600, 0, 3600),
+        # a relative after is relative to before, not to now
+        (-600, -300, 600),
+        # so are small positive values
+        (600, 0, 600),
+        (1700000000, 1700003600, 3600),
+        (-60, 1700000000, 60),
+    ],
+)
+def test_query_duration(after, before, duration):
+    assert _query_duration(after, before) == duration
+
+
+def test_query_duration_absolute_after_relative_before(monkeypatch):
+    monkeypatch.setattr(tools.time, "time", lambda: 1700003600)
+
+    assert _query_duration(1700000000, 0) == 3600
+    assert _query_duration(1700000000, -600) == 3000
+
+
+def test_plan_short_range_returns_every_sample():
+    assert _plan_chart_query(300, 1, 4, "percentage") == (300, "average")
+
+
+def test_plan_caps_cells_by_dimensions():
+    points, group = _plan_chart_query(86400, 1, 12, "percentage")
+
+    assert points == 100
+    assert group == "average"
+
+
+def test_plan_keeps_minimum_points_for_many_dimensions():
+    points, _ = _plan_chart_query(86400, 1, 1000, "percentage")
+
+    assert points == tools.CHART_DATA_MIN_POINTS
+
+
+def test_plan_uses_percentile_for_latency_when_aggregating():
+    assert _plan_chart_query(86400, 1, 2, "ms") == (600, "percentile")
+    assert _plan_chart_query(300, 1, 2, "ms") == (300, "average")
+    assert _plan_chart_query(86400, 1, 2, "ms", options="anomaly-bit") == (600, "average")
+
+
+def _alarm(name, status, changed, chart="disk.sda", **extra):
+    alarm = {
+        "name": name,
+        "status": status,
+        "last_status_change": changed,
+        "chart": chart,
+        "class": "Utilization",
+        "component": "Disk",
+        "units": "%",
+        "workload": "",
+        "silenced": False,
+    }
+    alarm.update(extra)
+    return alarm
+
+
+def test_compact_alarms_sorts_by_severity_then_recency_and_caps_rows():
+    alarms = {
+        "1": _alarm("clear_old", "CLEAR", 100),
+        "2": _alarm("warn", "WARNING", 300),
+        "3": _alarm("crit_old", "CRITICAL", 100, chart="cpu.cpu0"),
+        "4": _alarm("crit_new", "CRITICAL", 200),
+        "5": _alarm("weird", "SOMETHING", 500),
+    }
+
+    compact = _compact_alarms(alarms, max_rows=3)
+
+    names = [row[compact["fields"].index("name")] for row in compact["rows"]]
+    assert names == ["crit_new", "crit_old", "warn"]
+    assert compact["total"] == 5
+    assert compact["truncated"] == 2
+    assert compact["counts"]["status"] == {"CRITICAL": 2, "CLEAR": 1, "WARNING": 1, "SOMETHING": 1}
+    assert compact["counts"]["chart"] == {"disk.sda": 4, "cpu.cpu0": 1}
+    json.dumps(compact)
+
+
+def test_compact_alarms_drops_empty_and_hoists_constant_fields():
+    alarms = {"1": _alarm("a", "WARNING", 2), "2": _alarm("b", "CRITICAL", 1)}
+
+    compact = _compact_alarms(alarms, max_rows=10)
+
+    assert "workload" not in compact["fields"]
+    assert "workload" not in compact["constants"]
+    assert compact["constants"]["units"] == "%"
+    assert compact["constants"]["silenced"] is False
+    assert "units" not in compact["fields"]
+    assert all(len(row) == len(compact["fields"]) for row in compact["rows"])